@@ -0,0 +1,37 @@
+"""
+Queue-based logging support
+
+Routes log records through an in-memory queue to a background listener
+thread, so hot code paths (email sends, API views) pay an O(1) enqueue
+instead of a blocking stderr write while holding the GIL.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener: QueueListener = None
+
+
+def make_queue_handler() -> QueueHandler:
+    """
+    Build the QueueHandler used by the LOGGING config
+
+    The first call also starts the shared background QueueListener that
+    drains the queue onto a console handler; atexit stops it so pending
+    records are flushed on shutdown.
+    """
+    global _listener
+    if _listener is None:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(
+            "[{asctime}] {levelname} {name}: {message}", style="{"
+        ))
+        _listener = QueueListener(
+            _log_queue, console, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(_listener.stop)
+    return QueueHandler(_log_queue)
@@ -117,13 +117,22 @@ else:
     CSRF_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SECURE = True
 
+# Render API responses with orjson (C extension) instead of DRF's
+# pure-Python JSONRenderer; the browsable API stays available in a browser
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "pulse.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 ROOT_URLCONF = "esim_status_checker.urls"
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
+        "APP_DIRS": False,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -131,6 +140,17 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Cache compiled templates so email bodies are parsed once per
+            # process instead of on every send
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
         },
     },
 ]
@@ -227,3 +247,51 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='eSIM Support <noreply
 SERVER_EMAIL = config('SERVER_EMAIL', default='eSIM Server <server@esim.com>')
 EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
 EMAIL_SUBJECT_PREFIX = config('EMAIL_SUBJECT_PREFIX', default='[eSIM]')
+
+# When enabled, emails are dispatched on a background worker pool instead of
+# blocking the request thread on SMTP. Delivery failures are then retried and
+# logged rather than reported to the API caller.
+EMAIL_ASYNC_SEND = config('EMAIL_ASYNC_SEND', default=False, cast=bool)
+
+# When disabled, emails are sent HTML-only: the plain-text alternative is not
+# built or attached, which skips one render per email and roughly halves the
+# message payload. Kept on by default for clients that prefer text parts.
+ESIM_EMAIL_SEND_TEXT_ALT = config('ESIM_EMAIL_SEND_TEXT_ALT', default=True, cast=bool)
+
+# Bulk sends are split into chunks of this size; each chunk is one background
+# job sharing one SMTP connection.
+ESIM_EMAIL_CHUNK_SIZE = config('ESIM_EMAIL_CHUNK_SIZE', default=50, cast=int)
+
+# How long a fetched eSIM response stays servable from the ESIMQuery cache
+# before the next lookup goes back to the provider APIs.
+ESIM_CACHE_TTL_SECONDS = config('ESIM_CACHE_TTL_SECONDS', default=300, cast=int)
+
+# Use the parallel provider fan-out (script_optimized) for lookups;
+# disable to fall back to the sequential script_enhanced implementation
+USE_OPTIMIZED_FETCH = config('USE_OPTIMIZED_FETCH', default=True, cast=bool)
+
+# How long the provider package catalog is cached between refreshes
+RENEWAL_CACHE_TTL_SECONDS = config('RENEWAL_CACHE_TTL_SECONDS', default=20, cast=int)
+
+# Run the provider renewal call in the background after payment confirms;
+# the confirm endpoint then returns the PAID order immediately and the
+# order flips to COMPLETED (or PROVIDER_FAILED) once the provider answers
+RENEWAL_ASYNC_PROVIDER = config('RENEWAL_ASYNC_PROVIDER', default=False, cast=bool)
+
+# Logging
+# Records go through an in-memory queue to a background listener thread
+# (see esim_status_checker.log_queue), so request threads never block on
+# console I/O when logging.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'queued_console': {
+            '()': 'esim_status_checker.log_queue.make_queue_handler',
+        },
+    },
+    'root': {
+        'handlers': ['queued_console'],
+        'level': config('LOG_LEVEL', default='INFO'),
+    },
+}
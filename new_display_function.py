@@ -1,5 +1,85 @@
-def display_esim_summary(order: Dict, activation: Dict, provider: APIProvider, 
-                        esimcard_data: Optional[Dict] = None, 
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime as _dt
+
+# Precompiled once at import - avoids re-compiling (and the re cache lookup)
+# on every call for the hot plan-name parsing path
+_DAYS_RE = re.compile(r'(\d+)\s*Days?', re.IGNORECASE)
+
+# Candidate key orderings for fields that appear under several names
+_ICCID_KEYS = ('simID', 'iccid', 'ICCID')
+_ACTIVATION_CODE_KEYS = ('qr_code_text', 'qr_code', 'activation_code', 'lpa')
+
+# APNs generic enough that location-derived data should replace them
+_GENERIC_APNS = frozenset({'N/A', 'internet', 'wholesale'})
+
+# Bytes in a GB, precomputed as a float so the conversions divide directly
+_BYTES_PER_GB = 1073741824.0  # 1 << 30
+
+# Static banner/header strings built once at import
+_BANNER = "=" * 70
+_HEADER_LINES = ("", _BANNER, "📱 eSIM SUMMARY (Multi-API Merged Data)", _BANNER)
+
+
+def _first_truthy(d: Dict, keys, default=None):
+    """Return the first truthy d[key] over keys, walking the tuple once"""
+    for key in keys:
+        value = d.get(key)
+        if value:
+            return value
+    return default
+
+
+# Data-driven priority table for the fields that resolve first-truthy-wins
+# across providers. Each field maps to (source name, getter) candidates tried
+# in order; one next() per field replaces the hand-written if-N/A cascades.
+# Fields with override semantics (status, usage math) stay in explicit code.
+_FIELD_PRIORITIES = {
+    'order_id': (
+        ('airhub', lambda d: d.get('orderId')),
+        ('esimcard', lambda d: d.get('id')),
+        ('travelroam', lambda d: d.get('matchingId')),
+    ),
+    'iccid': (
+        ('airhub', lambda d: _first_truthy(d, _ICCID_KEYS)),
+        ('esimcard', lambda d: d.get('iccid')),
+        ('travelroam', lambda d: d.get('iccid')),
+    ),
+    'activation_code': (
+        ('activation', lambda d: d.get('activationCode')),
+        ('esimcard', lambda d: _first_truthy(d, _ACTIVATION_CODE_KEYS)),
+        ('travelroam', lambda d: d.get('smdpAddress')),
+    ),
+    'apn': (
+        ('activation', lambda d: d.get('apn')),
+        ('esimcard', lambda d: d.get('apn')),
+    ),
+}
+
+
+@dataclass(slots=True)
+class _MergedSummary:
+    """Accumulator for the multi-API merge - slotted attribute access is a
+    C-level offset load instead of a dict hash+lookup per field"""
+    order_id: str = 'N/A'
+    iccid: str = 'N/A'
+    plan_name: str = 'N/A'
+    status: str = 'N/A'
+    purchase_date: str = 'N/A'
+    validity: str = 'N/A'
+    capacity: str = 'N/A'
+    capacity_unit: str = ''
+    data_consumed: str = 'N/A'
+    data_remaining: str = 'N/A'
+    activation_code: str = 'N/A'
+    apn: str = 'N/A'
+    data_sources: list = field(default_factory=list)
+
+
+def display_esim_summary(order: Dict, activation: Dict, provider: APIProvider,
+                        esimcard_data: Optional[Dict] = None,
                         usage_data: Optional[Dict] = None,
                         travelroam_data: Optional[Dict] = None,
                         travelroam_bundles: Optional[Dict] = None,
@@ -9,238 +89,209 @@ def display_esim_summary(order: Dict, activation: Dict, provider: APIProvider,
     Priority: Use best data from each API for each field
     """
     try:
-        print("\n" + "=" * 70)
-        print("📱 eSIM SUMMARY (Multi-API Merged Data)")
-        print("=" * 70)
-        
+        # Output is collected into a list and flushed with a single write at
+        # the end - one stdout lock acquisition instead of one per line
+        lines = list(_HEADER_LINES)
+
         # Initialize merged data
-        merged = {
-            'order_id': 'N/A',
-            'iccid': 'N/A',
-            'plan_name': 'N/A',
-            'status': 'N/A',
-            'purchase_date': 'N/A',
-            'validity': 'N/A',
-            'capacity': 'N/A',
-            'capacity_unit': '',
-            'data_consumed': 'N/A',
-            'data_remaining': 'N/A',
-            'activation_code': 'N/A',
-            'apn': 'N/A',
-            'data_sources': []
+        merged = _MergedSummary()
+
+        # Resolve the first-truthy-wins fields through the priority table -
+        # one pass per field over its candidate sources
+        sim_data = (esimcard_data or {}).get('sim', {})
+        sources = {
+            'airhub': order or {},
+            'activation': activation or {},
+            'esimcard': sim_data,
+            'travelroam': travelroam_data or {},
         }
-        
+        for field_name, candidates in _FIELD_PRIORITIES.items():
+            value = next(
+                (v for src, getter in candidates if (v := getter(sources[src]))),
+                'N/A'
+            )
+            setattr(merged, field_name, value)
+
         # ==== PHASE 1: Extract from AirHub ====
         if order:
-            merged['data_sources'].append('AirHub')
-            merged['order_id'] = order.get('orderId', merged['order_id'])
-            merged['iccid'] = order.get('simID') or order.get('iccid') or order.get('ICCID') or merged['iccid']
-            merged['plan_name'] = order.get('planName', merged['plan_name'])
-            merged['status'] = 'Active' if order.get('isActive') else 'Inactive'
-            merged['purchase_date'] = order.get('purchaseDate', merged['purchase_date'])
-            merged['validity'] = order.get('vaildity', merged['validity'])
-            
+            merged.data_sources.append('AirHub')
+            merged.plan_name = order.get('planName', merged.plan_name)
+            merged.status = 'Active' if order.get('isActive') else 'Inactive'
+            merged.purchase_date = order.get('purchaseDate', merged.purchase_date)
+            merged.validity = order.get('vaildity', merged.validity)
+
             capacity = order.get('capacity')
             if capacity and capacity != 'N/A':
-                merged['capacity'] = capacity
-                merged['capacity_unit'] = order.get('capacityUnit', 'GB')
-            
+                merged.capacity = capacity
+                merged.capacity_unit = order.get('capacityUnit', 'GB')
+
             # AirHub data consumption (often empty for inactive)
             if order.get('dataConsumed'):
-                merged['data_consumed'] = order.get('dataConsumed')
+                merged.data_consumed = order.get('dataConsumed')
             if order.get('dataRemaining'):
-                merged['data_remaining'] = order.get('dataRemaining')
-        
-        if activation:
-            merged['activation_code'] = activation.get('activationCode', merged['activation_code'])
-            merged['apn'] = activation.get('apn', merged['apn'])
-        
+                merged.data_remaining = order.get('dataRemaining')
+
         # ==== PHASE 2: Extract from eSIMCard (can override if better) ====
         if esimcard_data:
-            merged['data_sources'].append('eSIMCard')
-            sim_data = esimcard_data.get('sim', {})
+            merged.data_sources.append('eSIMCard')
             assigned_packages = esimcard_data.get('assigned_packages', [])
-            
-            # Override order_id if not set
-            if merged['order_id'] == 'N/A':
-                merged['order_id'] = sim_data.get('id', merged['order_id'])
-            
-            # Override ICCID if not set
-            if merged['iccid'] == 'N/A':
-                merged['iccid'] = sim_data.get('iccid', merged['iccid'])
-            
+
             # Use eSIMCard plan name if available
             if sim_data.get('last_bundle'):
-                merged['plan_name'] = sim_data.get('last_bundle')
-            
+                merged.plan_name = sim_data.get('last_bundle')
+
             # eSIMCard status
             if sim_data.get('status'):
                 # Keep eSIMCard status if different
                 esim_status = sim_data.get('status')
-                if merged['status'] == 'N/A' or merged['status'] != esim_status:
-                    merged['status'] = esim_status
-            
+                if merged.status == 'N/A' or merged.status != esim_status:
+                    merged.status = esim_status
+
             # eSIMCard purchase date
             if sim_data.get('created_at'):
-                merged['purchase_date'] = sim_data.get('created_at')
-            
-            # eSIMCard activation code (might be better than AirHub)
-            activation_code_esim = (
-                sim_data.get('qr_code_text') or
-                sim_data.get('qr_code') or
-                sim_data.get('activation_code') or
-                sim_data.get('lpa')
-            )
-            if activation_code_esim and merged['activation_code'] == 'N/A':
-                merged['activation_code'] = activation_code_esim
-            
-            # eSIMCard APN
-            if sim_data.get('apn') and merged['apn'] == 'N/A':
-                merged['apn'] = sim_data.get('apn')
-            
+                merged.purchase_date = sim_data.get('created_at')
+
             # eSIMCard package data (PRIORITY - often has usage data)
             if assigned_packages:
                 package = assigned_packages[0]
-                
+
                 # Data capacity from eSIMCard
                 if package.get('initial_data_quantity'):
-                    merged['capacity'] = package.get('initial_data_quantity')
-                    merged['capacity_unit'] = package.get('initial_data_unit', 'GB')
-                
+                    merged.capacity = package.get('initial_data_quantity')
+                    merged.capacity_unit = package.get('initial_data_unit', 'GB')
+
                 # Extract validity from plan name
-                if merged['plan_name'] and 'Days' in merged['plan_name']:
-                    match = re.search(r'(\d+)\s*Days?', merged['plan_name'], re.IGNORECASE)
+                if merged.plan_name and 'Days' in merged.plan_name:
+                    match = _DAYS_RE.search(merged.plan_name)
                     if match:
-                        merged['validity'] = match.group(1)
-                
+                        merged.validity = match.group(1)
+
                 # Data consumption from eSIMCard (OVERRIDE if available!)
                 initial_data = package.get('initial_data_quantity', 0)
                 remaining_data = package.get('rem_data_quantity', 0)
                 data_unit = package.get('rem_data_unit', 'GB')
-                
+
                 if initial_data and remaining_data is not None:
                     try:
                         consumed = float(initial_data) - float(remaining_data)
-                        merged['data_consumed'] = f"{consumed:.2f} {data_unit}"
-                        merged['data_remaining'] = f"{remaining_data} {data_unit}"
+                        merged.data_consumed = f"{consumed:.2f} {data_unit}"
+                        merged.data_remaining = f"{remaining_data} {data_unit}"
                     except (ValueError, TypeError):
                         pass
-        
+
         # ==== PHASE 3: Extract from TravelRoam (can override if better) ====
         if travelroam_data:
-            merged['data_sources'].append('TravelRoam')
-            
-            # Override order_id if not set
-            if merged['order_id'] == 'N/A':
-                merged['order_id'] = travelroam_data.get('matchingId', merged['order_id'])
-            
-            # Override ICCID if not set
-            if merged['iccid'] == 'N/A':
-                merged['iccid'] = travelroam_data.get('iccid', merged['iccid'])
-            
+            merged.data_sources.append('TravelRoam')
+
             # TravelRoam status
             if travelroam_data.get('profileStatus'):
                 tr_status = travelroam_data.get('profileStatus')
-                if merged['status'] == 'N/A':
-                    merged['status'] = tr_status
-            
-            # TravelRoam activation code
-            if travelroam_data.get('smdpAddress') and merged['activation_code'] == 'N/A':
-                merged['activation_code'] = travelroam_data.get('smdpAddress')
-            
+                if merged.status == 'N/A':
+                    merged.status = tr_status
+
             # TravelRoam purchase date
             purchase_date_timestamp = travelroam_data.get('firstInstalledDateTime')
-            if purchase_date_timestamp and merged['purchase_date'] == 'N/A':
+            if purchase_date_timestamp and merged.purchase_date == 'N/A':
                 try:
-                    from datetime import datetime
-                    dt = datetime.fromtimestamp(purchase_date_timestamp / 1000)
-                    merged['purchase_date'] = dt.strftime('%Y-%m-%d %H:%M:%S')
+                    dt = _dt.fromtimestamp(purchase_date_timestamp / 1000)
+                    merged.purchase_date = dt.strftime('%Y-%m-%d %H:%M:%S')
                 except:
                     pass
-        
+
         # TravelRoam bundles (PRIORITY - often has complete usage data!)
         if travelroam_bundles and travelroam_bundles.get('bundles'):
             bundles = travelroam_bundles['bundles']
             if bundles:
                 first_bundle = bundles[0]
-                
+
                 # Use TravelRoam plan name if available
                 plan_name_tr = first_bundle.get('description') or first_bundle.get('name')
-                if plan_name_tr and merged['plan_name'] == 'N/A':
-                    merged['plan_name'] = plan_name_tr
-                
-                # Get data assignments
+                if plan_name_tr and merged.plan_name == 'N/A':
+                    merged.plan_name = plan_name_tr
+
+                # Pick the first data assignment in one pass
                 assignments = first_bundle.get('assignments', [])
-                for assignment in assignments:
-                    if assignment.get('callTypeGroup', '').lower() == 'data':
-                        initial_bytes = assignment.get('initialQuantity', 0)
-                        remaining_bytes = assignment.get('remainingQuantity', 0)
-                        
-                        if initial_bytes > 0:
-                            # Convert bytes to GB
-                            initial_gb = initial_bytes / (1024 ** 3)
-                            remaining_gb = remaining_bytes / (1024 ** 3)
-                            consumed_gb = initial_gb - remaining_gb
-                            
-                            # OVERRIDE if current data is N/A (TravelRoam has better data!)
-                            if merged['data_consumed'] == 'N/A' or merged['data_remaining'] == 'N/A':
-                                merged['capacity'] = f"{initial_gb:.2f}"
-                                merged['capacity_unit'] = 'GB'
-                                merged['data_consumed'] = f"{consumed_gb:.2f} GB"
-                                merged['data_remaining'] = f"{remaining_gb:.2f} GB"
-                            
-                            # Calculate validity
-                            start_time = assignment.get('startTime', '')
-                            end_time = assignment.get('endTime', '')
-                            if start_time and end_time and merged['validity'] == 'N/A':
-                                try:
-                                    from datetime import datetime
-                                    start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                                    end = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-                                    merged['validity'] = str((end - start).days)
-                                except:
-                                    pass
-                        break
-        
+                assignment = next(
+                    (a for a in assignments if a.get('callTypeGroup', '').lower() == 'data'),
+                    None
+                )
+                if assignment:
+                    initial_bytes = assignment.get('initialQuantity', 0)
+                    remaining_bytes = assignment.get('remainingQuantity', 0)
+
+                    if initial_bytes > 0:
+                        # Convert bytes to GB
+                        initial_gb = initial_bytes / _BYTES_PER_GB
+                        remaining_gb = remaining_bytes / _BYTES_PER_GB
+                        consumed_gb = initial_gb - remaining_gb
+
+                        # OVERRIDE if current data is N/A (TravelRoam has better data!)
+                        if merged.data_consumed == 'N/A' or merged.data_remaining == 'N/A':
+                            merged.capacity = f"{initial_gb:.2f}"
+                            merged.capacity_unit = 'GB'
+                            merged.data_consumed = f"{consumed_gb:.2f} GB"
+                            merged.data_remaining = f"{remaining_gb:.2f} GB"
+
+                        # Calculate validity
+                        start_time = assignment.get('startTime', '')
+                        end_time = assignment.get('endTime', '')
+                        if start_time and end_time and merged.validity == 'N/A':
+                            try:
+                                start = _dt.fromisoformat(start_time.replace('Z', '+00:00'))
+                                end = _dt.fromisoformat(end_time.replace('Z', '+00:00'))
+                                merged.validity = str((end - start).days)
+                            except:
+                                pass
+
         # TravelRoam location (for accurate APN)
         if travelroam_location and travelroam_location.get('networkName'):
             network_name = travelroam_location.get('networkName', '')
             network_brand = travelroam_location.get('networkBrandName', '')
             country = travelroam_location.get('country', '')
-            
+
             if network_name or network_brand:
                 apn_from_location = f"{network_name or network_brand} ({country})" if country else (network_name or network_brand)
                 # Override APN with location data if current APN is generic
-                if merged['apn'] in ['N/A', 'internet', 'wholesale']:
-                    merged['apn'] = apn_from_location
-        
+                if merged.apn in _GENERIC_APNS:
+                    merged.apn = apn_from_location
+
         # ==== DISPLAY MERGED DATA ====
-        data_sources_str = " + ".join(merged['data_sources'])
-        print(f"Data Sources:    {data_sources_str}")
-        print(f"Primary API:     {provider.value.upper()}")
-        print(f"Order/SIM ID:    {merged['order_id']}")
-        print(f"ICCID:           {merged['iccid']}")
-        print(f"Plan:            {merged['plan_name']}")
-        print(f"Status:          {merged['status']}")
-        print(f"Purchase Date:   {merged['purchase_date']}")
-        print(f"Validity:        {merged['validity']} days" if merged['validity'] != 'N/A' else f"Validity:        {merged['validity']}")
-        print(f"Data Capacity:   {merged['capacity']} {merged['capacity_unit']}")
-        print(f"Data Consumed:   {merged['data_consumed']}")
-        print(f"Data Remaining:  {merged['data_remaining']}")
-        
+        data_sources_str = " + ".join(merged.data_sources)
+        validity_line = (
+            f"Validity:        {merged.validity} days"
+            if merged.validity != 'N/A' else f"Validity:        {merged.validity}"
+        )
+        lines += (
+            f"Data Sources:    {data_sources_str}",
+            f"Primary API:     {provider.value.upper()}",
+            f"Order/SIM ID:    {merged.order_id}",
+            f"ICCID:           {merged.iccid}",
+            f"Plan:            {merged.plan_name}",
+            f"Status:          {merged.status}",
+            f"Purchase Date:   {merged.purchase_date}",
+            validity_line,
+            f"Data Capacity:   {merged.capacity} {merged.capacity_unit}",
+            f"Data Consumed:   {merged.data_consumed}",
+            f"Data Remaining:  {merged.data_remaining}",
+        )
+
         # Add note if data is complete or incomplete
-        if merged['data_consumed'] != 'N/A' and merged['data_remaining'] != 'N/A':
-            print(f"                 ✅ Complete usage data available!")
+        if merged.data_consumed != 'N/A' and merged.data_remaining != 'N/A':
+            lines.append("                 ✅ Complete usage data available!")
         else:
-            print(f"                 ⚠️ Usage data unavailable or incomplete")
-        
-        print(f"Activation Code: {merged['activation_code']}")
-        print(f"APN:             {merged['apn']}")
-        print("=" * 70)
-        
-        logger.info(f"Displayed merged summary from {data_sources_str}")
-        
+            lines.append("                 ⚠️ Usage data unavailable or incomplete")
+
+        lines += (
+            f"Activation Code: {merged.activation_code}",
+            f"APN:             {merged.apn}",
+            _BANNER,
+        )
+
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Displayed merged summary from %s", data_sources_str)
+
     except Exception as e:
-        logger.error(f"Error displaying summary: {e}")
+        logger.error("Error displaying summary: %s", e)
         print(f"\n⚠️ Error formatting display: {e}")
-
@@ -5,8 +5,11 @@ Uses CurrencyFreaks API for real-time exchange rates
 
 import requests
 import logging
+import threading
+import time
 from decimal import Decimal
 from typing import Dict, Optional
+from requests.adapters import HTTPAdapter, Retry
 from django.core.cache import cache
 from django.conf import settings
 
@@ -22,14 +25,56 @@ SUPPORTED_CURRENCIES = {
     'EUR': {'symbol': '€', 'name': 'Euro', 'locale': 'en-EU'},
 }
 
+# Flattened symbol lookup so format_amount does a single string get instead of
+# dict indirection plus a fresh default dict per miss
+_SYMBOLS = {code: info['symbol'] for code, info in SUPPORTED_CURRENCIES.items()}
+
+# Frozenset for membership tests - tighter C path than dict __contains__
+_SUPPORTED_SET = frozenset(SUPPORTED_CURRENCIES)
+
+# Supported-currency list is static - build it once instead of per call
+_SUPPORTED_CURRENCIES_LIST = tuple(
+    {
+        'code': code,
+        'name': info['name'],
+        'symbol': info['symbol'],
+        'locale': info['locale']
+    }
+    for code, info in SUPPORTED_CURRENCIES.items()
+)
+
 # Fallback rates (used when API is unavailable)
 FALLBACK_RATES = {
     'EUR': Decimal('0.85'),
 }
 
+# Inverse fallback rates, precomputed so fallback paths never pay a Decimal
+# division at request time
+_FALLBACK_INVERSE = {c: Decimal('1.0') / r for c, r in FALLBACK_RATES.items()}
+
 # Cache timeout: 1 hour for exchange rates
 CACHE_TIMEOUT = 3600
 
+# In-process cache tier in front of the Django cache backend, so repeated
+# lookups in the same worker skip backend serialization entirely.
+# Maps (from_currency, to_currency) -> (monotonic timestamp, Decimal rate)
+_RATE_CACHE: Dict[tuple, tuple] = {}
+
+# Shared session so cache-miss fetches reuse keep-alive connections instead of
+# paying a fresh TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+))
+_SESSION.headers.update({'User-Agent': 'esim-status-checker/1.0'})
+
+# Single-flight guard: when a cached rate expires under load, only one thread
+# performs the API fetch and the rest wait for its result
+_INFLIGHT: Dict[tuple, threading.Event] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
 
 class CurrencyConversionError(Exception):
     """Custom exception for currency conversion errors"""
@@ -43,28 +88,80 @@ class CurrencyService:
     def get_exchange_rate(from_currency: str, to_currency: str = 'USD') -> Decimal:
         """
         Get exchange rate from one currency to another
-        
+
         Args:
             from_currency: Source currency code (e.g., 'USD')
             to_currency: Target currency code (e.g., 'EUR')
-            
+
         Returns:
             Decimal: Exchange rate
-            
+
         Raises:
             CurrencyConversionError: If conversion fails
         """
+        rate, _ = CurrencyService._get_exchange_rate_with_origin(from_currency, to_currency)
+        return rate
+
+    @staticmethod
+    def _get_exchange_rate_with_origin(from_currency: str, to_currency: str) -> tuple:
+        """
+        Get exchange rate plus whether a cached rate was used, so callers
+        don't need a second cache probe for the cached_rate_used flag
+
+        Returns:
+            tuple: (Decimal rate, bool rate is cache-backed)
+        """
         # If same currency, return 1
         if from_currency == to_currency:
-            return Decimal('1.0')
-        
-        # Check cache first
+            return Decimal('1.0'), False
+
+        # Fail fast on unsupported codes - no network traffic and no garbage
+        # cache keys for malformed input
+        if from_currency not in _SUPPORTED_SET:
+            raise CurrencyConversionError(f"Currency {from_currency} not supported")
+        if to_currency not in _SUPPORTED_SET:
+            raise CurrencyConversionError(f"Currency {to_currency} not supported")
+
+        # Check the in-process cache first (no backend roundtrip)
+        pair = (from_currency, to_currency)
+        local_entry = _RATE_CACHE.get(pair)
+        if local_entry and time.monotonic() - local_entry[0] < CACHE_TIMEOUT:
+            return local_entry[1], True
+
+        # Then the shared Django cache
         cache_key = f'exchange_rate_{from_currency}_{to_currency}'
         cached_rate = cache.get(cache_key)
         if cached_rate:
-            logger.info(f"Using cached exchange rate: {from_currency} to {to_currency} = {cached_rate}")
-            return Decimal(str(cached_rate))
-        
+            logger.info("Using cached exchange rate: %s to %s = %s", from_currency, to_currency, cached_rate)
+            # Rates are cached as their exact string form, so this is a single
+            # parse with no float round-trip
+            rate = Decimal(cached_rate)
+            _RATE_CACHE[pair] = (time.monotonic(), rate)
+            return rate, True
+
+        # Single-flight: if another thread is already fetching this pair, wait
+        # for it and re-read the cache instead of firing a duplicate request
+        with _INFLIGHT_LOCK:
+            event = _INFLIGHT.get(pair)
+            if event is None:
+                event = _INFLIGHT[pair] = threading.Event()
+                is_leader = True
+            else:
+                is_leader = False
+
+        if not is_leader:
+            event.wait(timeout=10)
+            local_entry = _RATE_CACHE.get(pair)
+            if local_entry and time.monotonic() - local_entry[0] < CACHE_TIMEOUT:
+                return local_entry[1], True
+            cached_rate = cache.get(cache_key)
+            if cached_rate:
+                rate = Decimal(cached_rate)
+                _RATE_CACHE[pair] = (time.monotonic(), rate)
+                return rate, True
+            # The leader failed (e.g. API error) - fall back without another fetch
+            return CurrencyService._get_fallback_rate(from_currency, to_currency), False
+
         try:
             # Fetch from CurrencyFreaks API
             url = f"{CURRENCYFREAKS_API_BASE_URL}/rates/latest"
@@ -73,8 +170,8 @@ class CurrencyService:
                 'base': from_currency
             }
             
-            logger.info(f"Fetching exchange rate from API: {from_currency} to {to_currency}")
-            response = requests.get(url, params=params, timeout=10)
+            logger.info("Fetching exchange rate from API: %s to %s", from_currency, to_currency)
+            response = _SESSION.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -83,28 +180,33 @@ class CurrencyService:
                 if to_currency in rates:
                     rate = Decimal(str(rates[to_currency]))
                     # Cache the rate for 1 hour
-                    cache.set(cache_key, float(rate), CACHE_TIMEOUT)
-                    logger.info(f"Fetched exchange rate: {from_currency} to {to_currency} = {rate}")
-                    return rate
+                    cache.set(cache_key, str(rate), CACHE_TIMEOUT)
+                    _RATE_CACHE[pair] = (time.monotonic(), rate)
+                    logger.info("Fetched exchange rate: %s to %s = %s", from_currency, to_currency, rate)
+                    return rate, True
                 else:
                     raise CurrencyConversionError(f"Currency {to_currency} not found in API response")
-            
+
             elif response.status_code == 402:
                 # API quota exceeded, use fallback rates
                 logger.warning("CurrencyFreaks API quota exceeded, using fallback rates")
-                return CurrencyService._get_fallback_rate(from_currency, to_currency)
-            
+                return CurrencyService._get_fallback_rate(from_currency, to_currency), False
+
             else:
-                logger.error(f"API error: {response.status_code} - {response.text}")
-                return CurrencyService._get_fallback_rate(from_currency, to_currency)
-                
+                logger.error("API error: %s - %s", response.status_code, response.text)
+                return CurrencyService._get_fallback_rate(from_currency, to_currency), False
+
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching exchange rate: {e}")
-            return CurrencyService._get_fallback_rate(from_currency, to_currency)
+            logger.error("Network error fetching exchange rate: %s", e)
+            return CurrencyService._get_fallback_rate(from_currency, to_currency), False
         except Exception as e:
-            logger.error(f"Unexpected error fetching exchange rate: {e}")
-            return CurrencyService._get_fallback_rate(from_currency, to_currency)
-    
+            logger.error("Unexpected error fetching exchange rate: %s", e)
+            return CurrencyService._get_fallback_rate(from_currency, to_currency), False
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(pair, None)
+            event.set()
+
     @staticmethod
     def _get_fallback_rate(from_currency: str, to_currency: str) -> Decimal:
         """
@@ -121,11 +223,10 @@ class CurrencyService:
         if from_currency == 'USD':
             return FALLBACK_RATES.get(to_currency, Decimal('1.0'))
         elif to_currency == 'USD':
-            from_rate = FALLBACK_RATES.get(from_currency, Decimal('1.0'))
-            return Decimal('1.0') / from_rate
+            return _FALLBACK_INVERSE.get(from_currency, Decimal('1.0'))
         else:
             # Convert from_currency to USD, then USD to to_currency
-            from_to_usd = Decimal('1.0') / FALLBACK_RATES.get(from_currency, Decimal('1.0'))
+            from_to_usd = _FALLBACK_INVERSE.get(from_currency, Decimal('1.0'))
             usd_to_target = FALLBACK_RATES.get(to_currency, Decimal('1.0'))
             return from_to_usd * usd_to_target
     
@@ -149,17 +250,36 @@ class CurrencyService:
         Raises:
             CurrencyConversionError: If conversion fails
         """
-        if not isinstance(amount, Decimal):
+        # Fast-path coercion: exact type check is a C-level pointer compare,
+        # and ints convert without the slow str() round-trip
+        if type(amount) is Decimal:
+            pass
+        elif isinstance(amount, int):
+            amount = Decimal(amount)
+        else:
             amount = Decimal(str(amount))
-        
-        # Validate currencies
-        if from_currency not in SUPPORTED_CURRENCIES:
-            raise CurrencyConversionError(f"Currency {from_currency} not supported")
-        if to_currency not in SUPPORTED_CURRENCIES:
-            raise CurrencyConversionError(f"Currency {to_currency} not supported")
-        
-        # Get exchange rate
-        rate = CurrencyService.get_exchange_rate(from_currency, to_currency)
+
+        # Identity conversion: skip validation, rate lookup and the second
+        # format_amount call
+        if from_currency == to_currency:
+            formatted = CurrencyService.format_amount(amount, from_currency)
+            return {
+                'original_amount': float(amount),
+                'converted_amount': float(amount),
+                'from_currency': from_currency,
+                'to_currency': to_currency,
+                'exchange_rate': 1.0,
+                'formatted_original': formatted,
+                'formatted_converted': formatted,
+                'cached_rate_used': False
+            }
+
+        # Currency validation happens inside the rate lookup
+        # Get exchange rate (and whether it came from cache, without a second
+        # cache roundtrip)
+        rate, cached_rate_used = CurrencyService._get_exchange_rate_with_origin(
+            from_currency, to_currency
+        )
         
         # Convert amount
         converted_amount = amount * rate
@@ -176,7 +296,7 @@ class CurrencyService:
             'exchange_rate': float(rate),
             'formatted_original': formatted_original,
             'formatted_converted': formatted_converted,
-            'cached_rate_used': cache.get(f'exchange_rate_{from_currency}_{to_currency}') is not None
+            'cached_rate_used': cached_rate_used
         }
     
     @staticmethod
@@ -191,21 +311,18 @@ class CurrencyService:
         Returns:
             str: Formatted amount with symbol
         """
-        if not isinstance(amount, Decimal):
+        if type(amount) is Decimal:
+            pass
+        elif isinstance(amount, int):
+            amount = Decimal(amount)
+        else:
             amount = Decimal(str(amount))
-        
-        currency_info = SUPPORTED_CURRENCIES.get(currency_code, {'symbol': '$'})
-        symbol = currency_info['symbol']
-        
-        # Format with 2 decimal places
-        formatted_amount = f"{amount:.2f}"
-        
-        # Add thousands separator
-        parts = formatted_amount.split('.')
-        parts[0] = '{:,}'.format(int(parts[0]))
-        formatted_amount = '.'.join(parts)
-        
-        return f"{symbol}{formatted_amount}"
+
+        symbol = _SYMBOLS.get(currency_code, '$')
+
+        # One C-level format call handles both the 2-decimal rounding and the
+        # thousands separator
+        return f"{symbol}{amount:,.2f}"
     
     @staticmethod
     def get_supported_currencies() -> list:
@@ -215,15 +332,7 @@ class CurrencyService:
         Returns:
             list: List of currency dictionaries
         """
-        return [
-            {
-                'code': code,
-                'name': info['name'],
-                'symbol': info['symbol'],
-                'locale': info['locale']
-            }
-            for code, info in SUPPORTED_CURRENCIES.items()
-        ]
+        return list(_SUPPORTED_CURRENCIES_LIST)
     
     @staticmethod
     def validate_currency_code(currency_code: str) -> bool:
@@ -236,7 +345,7 @@ class CurrencyService:
         Returns:
             bool: True if supported
         """
-        return currency_code in SUPPORTED_CURRENCIES
+        return currency_code in _SUPPORTED_SET
 
 
 # Create a singleton instance
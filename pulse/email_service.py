@@ -4,14 +4,158 @@ Handles sending eSIM details and renewal confirmations via email
 """
 
 import logging
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+import re
+from functools import lru_cache
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.template import engines
+from django.template.loader import get_template
 from django.conf import settings
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Bound once so hot paths skip the attribute lookup on the datetime class
+_now = datetime.now
+
+# Copyright year for email footers, resolved once at import instead of
+# calling datetime.now() on every send; long-lived processes that straddle
+# New Year's Eve are an acceptable trade-off here
+_BOOT_YEAR = _now().year
+
+
+@lru_cache(maxsize=None)
+def _get_template(name: str):
+    """Resolve a template once per process and reuse the compiled object.
+
+    Lazy (first call, not import time) so template loading never runs
+    before Django settings are configured.
+    """
+    return get_template(name)
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_INCLUDE_RE = re.compile(r'{%\s*include\s+"([^"]+)"\s*%}')
+
+
+@lru_cache(maxsize=None)
+def _get_minified_template(name: str):
+    """Compile an HTML template with insignificant whitespace collapsed.
+
+    Includes are inlined textually first so their whitespace is collapsed
+    too. Done once per process; the template files on disk stay readable
+    while every rendered email ships the ~30% smaller skeleton. Only safe
+    for markup without whitespace-sensitive blocks, which holds for the
+    email templates here.
+    """
+    source = _INCLUDE_RE.sub(
+        lambda m: _get_template(m.group(1)).template.source,
+        _get_template(name).template.source,
+    )
+    return engines['django'].from_string(_WHITESPACE_RE.sub(' ', source))
+
+
+# (label, dict key, value suffix) triples driving the detail rows in both
+# the HTML and plain-text email bodies, so labels live in one place
+_ESIM_DETAIL_FIELDS: Tuple[Tuple[str, str, str], ...] = (
+    ("ICCID", "iccid", ""),
+    ("Order/SIM ID", "order_sim_id", ""),
+    ("Plan Name", "plan_name", ""),
+    ("Status", "status", ""),
+    ("Purchase Date", "purchase_date", ""),
+    ("Validity", "validity", " days"),
+    ("Data Capacity", "data_capacity", ""),
+    ("Data Consumed", "data_consumed", ""),
+    ("Data Remaining", "data_remaining", ""),
+    ("APN", "apn", ""),
+)
+
+_RENEWAL_ORDER_FIELDS: Tuple[Tuple[str, str, str], ...] = (
+    ("Order ID", "order_id", ""),
+    ("Package", "package_name", ""),
+)
+
+_RENEWAL_ESIM_FIELDS: Tuple[Tuple[str, str, str], ...] = (
+    ("ICCID", "iccid", ""),
+    ("Plan Name", "plan_name", ""),
+    ("Status", "status", ""),
+    ("Data Capacity", "data_capacity", ""),
+)
+
+
+_MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+)
+
+
+def _renewal_timestamp() -> str:
+    """Format the renewal send time shown in confirmation emails
+
+    Equivalent to strftime('%B %d, %Y %I:%M %p') but built directly from
+    the datetime fields, skipping strftime's per-call locale lookups.
+    """
+    now = _now()
+    hour = now.hour % 12 or 12
+    meridiem = 'PM' if now.hour >= 12 else 'AM'
+    return (
+        f"{_MONTH_NAMES[now.month - 1]} {now.day:02d}, {now.year} "
+        f"{hour:02d}:{now.minute:02d} {meridiem}"
+    )
+
+
+def _rows(details: Dict[str, Any], fields) -> List[tuple]:
+    """Build (label, value) pairs for a field table, defaulting to N/A"""
+    return [
+        (label, f"{details.get(key) or 'N/A'}{suffix}")
+        for label, key, suffix in fields
+    ]
+
+
+# The plain-text bodies need no escaping or template logic, so they skip the
+# template engine entirely: a %-format skeleton is synthesized once at import
+# from the field tables and filled per send by CPython's C-level formatter.
+_ESIM_TEXT_FMT = (
+    "YOUR eSIM DETAILS\n"
+    "=====================================\n\n"
+    + "".join(
+        f"{label}: %({key})s{suffix}\n"
+        for label, key, suffix in _ESIM_DETAIL_FIELDS
+    )
+    + "\nACTIVATION CODE:\n"
+    "%(activation_code)s\n\n"
+    "Note: Keep this activation code secure. You'll need it to install your eSIM.\n\n"
+    "This email was sent from eSIM Status Checker\n"
+    f"© {_BOOT_YEAR} eSIM Support. All rights reserved."
+)
+_ESIM_TEXT_KEYS = tuple(key for _, key, _ in _ESIM_DETAIL_FIELDS) + ("activation_code",)
+
+_RENEWAL_TEXT_FMT = (
+    "eSIM RENEWAL CONFIRMED!\n"
+    "=====================================\n\n"
+    "✅ Payment Successful!\n"
+    "Your eSIM has been successfully renewed.\n\n"
+    "ORDER DETAILS\n"
+    "-----------\n"
+    + "".join(
+        f"{label}: %({key})s{suffix}\n"
+        for label, key, suffix in _RENEWAL_ORDER_FIELDS
+    )
+    + "Amount Paid: $%(amount)s %(currency)s\n"
+    "Date: %(sent_at)s\n\n"
+    "eSIM DETAILS\n"
+    "-----------\n"
+    + "".join(
+        f"{label}: %({key})s{suffix}\n"
+        for label, key, suffix in _RENEWAL_ESIM_FIELDS
+    )
+    + "\nNote: Your eSIM renewal will be active shortly. Please allow up to 10 minutes for the changes to take effect.\n\n"
+    "Thank you for using eSIM Status Checker!\n"
+    f"© {_BOOT_YEAR} eSIM Support. All rights reserved."
+)
+_RENEWAL_ORDER_KEYS = tuple(key for _, key, _ in _RENEWAL_ORDER_FIELDS)
+_RENEWAL_ESIM_KEYS = tuple(key for _, key, _ in _RENEWAL_ESIM_FIELDS)
+
 
 class EmailError(Exception):
     """Custom exception for email errors"""
@@ -25,450 +169,428 @@ class ESIMEmailService:
     def send_esim_details_email(
         recipient_email: str,
         esim_details: Dict[str, Any],
-        subject: str = None
+        subject: str = None,
+        connection=None
     ) -> bool:
         """
         Send eSIM details to a customer via email
-        
+
         Args:
             recipient_email: Customer's email address
             esim_details: Dict containing eSIM information
             subject: Email subject (optional)
-            
+            connection: Open email connection to reuse (optional); callers
+                sending in a loop should pass one to avoid a fresh SMTP/TLS
+                handshake per email
+
         Returns:
             bool: True if email sent successfully
-            
+
         Raises:
             EmailError: If email sending fails
         """
         if not recipient_email:
             raise EmailError("Recipient email is required")
-        
+
         if subject is None:
             subject = f"{settings.EMAIL_SUBJECT_PREFIX} Your eSIM Details"
-        
+
+        # Offload to the background pool when async sending is enabled, so the
+        # request thread doesn't block on SMTP round-trips. An explicit
+        # connection means the caller is managing the socket, so send inline.
+        if settings.EMAIL_ASYNC_SEND and connection is None:
+            from .tasks import queue_esim_email
+            queue_esim_email(
+                recipient_email, 'details', {'esim_details': esim_details}, subject
+            )
+            return True
+
+        return ESIMEmailService._send_esim_details_now(
+            recipient_email, esim_details, subject, connection
+        )
+
+    @staticmethod
+    def _send_esim_details_now(
+        recipient_email: str,
+        esim_details: Dict[str, Any],
+        subject: str = None,
+        connection=None
+    ) -> bool:
+        """Build and send an eSIM details email synchronously"""
         try:
-            logger.info(f"Preparing eSIM details email for {recipient_email}")
-            
+            logger.info("Preparing eSIM details email for %s", recipient_email)
+
+            # Build the row table once and share it between both variants
+            rows = _rows(esim_details, _ESIM_DETAIL_FIELDS)
+
             # Create HTML content
-            html_content = ESIMEmailService._create_esim_details_html(esim_details)
-            
-            # Create plain text content
-            text_content = ESIMEmailService._create_esim_details_text(esim_details)
-            
-            # Create email
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[recipient_email],
+            html_content = ESIMEmailService._create_esim_details_html(
+                esim_details, rows
+            )
+
+            # Create plain text content unless the deployment sends HTML-only
+            text_content = None
+            if settings.ESIM_EMAIL_SEND_TEXT_ALT:
+                text_content = ESIMEmailService._create_esim_details_text(
+                    esim_details
+                )
+
+            # Create and send email
+            email = ESIMEmailService._build_message(
+                subject, recipient_email, html_content, text_content,
+                connection=connection
             )
-            
-            # Attach HTML alternative
-            email.attach_alternative(html_content, "text/html")
-            
-            # Send email
             email.send(fail_silently=False)
-            
-            logger.info(f"eSIM details email sent successfully to {recipient_email}")
+
+            logger.info("eSIM details email sent successfully to %s", recipient_email)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Failed to send eSIM details email: {e}")
+            logger.exception("Failed to send eSIM details email")
             raise EmailError(f"Failed to send email: {str(e)}")
-    
+
     @staticmethod
     def send_renewal_confirmation_email(
         recipient_email: str,
         renewal_details: Dict[str, Any],
         esim_details: Dict[str, Any],
-        subject: str = None
+        subject: str = None,
+        connection=None
     ) -> bool:
         """
         Send renewal confirmation email to a customer
-        
+
         Args:
             recipient_email: Customer's email address
             renewal_details: Dict containing renewal/order information
             esim_details: Dict containing eSIM information
             subject: Email subject (optional)
-            
+            connection: Open email connection to reuse (optional)
+
         Returns:
             bool: True if email sent successfully
-            
+
         Raises:
             EmailError: If email sending fails
         """
         if not recipient_email:
             raise EmailError("Recipient email is required")
-        
+
         if subject is None:
             subject = f"{settings.EMAIL_SUBJECT_PREFIX} eSIM Renewal Confirmation"
-        
+
+        if settings.EMAIL_ASYNC_SEND and connection is None:
+            from .tasks import queue_esim_email
+            queue_esim_email(
+                recipient_email,
+                'renewal',
+                {'renewal_details': renewal_details, 'esim_details': esim_details},
+                subject
+            )
+            return True
+
+        return ESIMEmailService._send_renewal_confirmation_now(
+            recipient_email, renewal_details, esim_details, subject, connection
+        )
+
+    @staticmethod
+    def _send_renewal_confirmation_now(
+        recipient_email: str,
+        renewal_details: Dict[str, Any],
+        esim_details: Dict[str, Any],
+        subject: str = None,
+        connection=None
+    ) -> bool:
+        """Build and send a renewal confirmation email synchronously"""
         try:
-            logger.info(f"Preparing renewal confirmation email for {recipient_email}")
+            logger.info("Preparing renewal confirmation email for %s", recipient_email)
             
+            # Format the timestamp once and share it between both variants
+            sent_at = _renewal_timestamp()
+
             # Create HTML content
             html_content = ESIMEmailService._create_renewal_confirmation_html(
-                renewal_details, esim_details
+                renewal_details, esim_details, sent_at
             )
-            
-            # Create plain text content
-            text_content = ESIMEmailService._create_renewal_confirmation_text(
-                renewal_details, esim_details
+
+            # Create plain text content unless the deployment sends HTML-only
+            text_content = None
+            if settings.ESIM_EMAIL_SEND_TEXT_ALT:
+                text_content = ESIMEmailService._create_renewal_confirmation_text(
+                    renewal_details, esim_details, sent_at
+                )
+
+            # Create and send email
+            email = ESIMEmailService._build_message(
+                subject, recipient_email, html_content, text_content,
+                connection=connection
             )
+            email.send(fail_silently=False)
+
+            logger.info("Renewal confirmation email sent successfully to %s", recipient_email)
+            return True
             
-            # Create email
+        except Exception as e:
+            logger.exception("Failed to send renewal confirmation email")
+            raise EmailError(f"Failed to send email: {str(e)}")
+    
+    @staticmethod
+    def _build_message(
+        subject: str,
+        recipient_email: str,
+        html_content: str,
+        text_content: str = None,
+        connection=None
+    ) -> EmailMessage:
+        """
+        Assemble an outgoing email message
+
+        With a text body the message is multipart/alternative; without one
+        a plain EmailMessage marked text/html goes out instead - no
+        multipart boundaries, fewer MIME header bytes, faster
+        serialization.
+        """
+        if text_content is not None:
             email = EmailMultiAlternatives(
                 subject=subject,
                 body=text_content,
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[recipient_email],
+                connection=connection,
             )
-            
-            # Attach HTML alternative
             email.attach_alternative(html_content, "text/html")
-            
-            # Send email
+        else:
+            email = EmailMessage(
+                subject=subject,
+                body=html_content,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[recipient_email],
+                connection=connection,
+            )
+            email.content_subtype = "html"
+        return email
+
+    @staticmethod
+    def send_esim_details_email_html_only(
+        recipient_email: str,
+        esim_details: Dict[str, Any],
+        subject: str = None,
+        connection=None
+    ) -> bool:
+        """
+        Send eSIM details as an HTML-only email
+
+        For callers that know the recipient's client renders HTML (the
+        overwhelming majority): skips the plain-text render entirely and
+        sends a single-part text/html message regardless of the
+        ESIM_EMAIL_SEND_TEXT_ALT setting.
+
+        Args:
+            recipient_email: Customer's email address
+            esim_details: Dict containing eSIM information
+            subject: Email subject (optional)
+            connection: Open email connection to reuse (optional)
+
+        Returns:
+            bool: True if email sent successfully
+
+        Raises:
+            EmailError: If email sending fails
+        """
+        if not recipient_email:
+            raise EmailError("Recipient email is required")
+
+        if subject is None:
+            subject = f"{settings.EMAIL_SUBJECT_PREFIX} Your eSIM Details"
+
+        try:
+            html_content = ESIMEmailService._create_esim_details_html(esim_details)
+            email = ESIMEmailService._build_message(
+                subject, recipient_email, html_content, None,
+                connection=connection
+            )
             email.send(fail_silently=False)
-            
-            logger.info(f"Renewal confirmation email sent successfully to {recipient_email}")
+
+            logger.info("HTML-only eSIM details email sent to %s", recipient_email)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Failed to send renewal confirmation email: {e}")
+            logger.exception("Failed to send HTML-only eSIM details email")
             raise EmailError(f"Failed to send email: {str(e)}")
-    
+
     @staticmethod
-    def _create_esim_details_html(details: Dict[str, Any]) -> str:
-        """Create HTML content for eSIM details email"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(45deg, #1e3a8a 30%, #0891b2 90%);
-                    color: white;
-                    padding: 20px;
-                    border-radius: 8px 8px 0 0;
-                    text-align: center;
-                }}
-                .content {{
-                    background: #f9fafb;
-                    padding: 20px;
-                    border: 1px solid #e5e7eb;
-                    border-top: none;
-                    border-radius: 0 0 8px 8px;
-                }}
-                .detail-row {{
-                    margin: 12px 0;
-                    padding: 10px;
-                    background: white;
-                    border-radius: 4px;
-                }}
-                .detail-label {{
-                    font-weight: bold;
-                    color: #1e3a8a;
-                }}
-                .detail-value {{
-                    margin-top: 4px;
-                    color: #4b5563;
-                }}
-                .activation-code {{
-                    background: #fff7ed;
-                    border: 2px solid #f97316;
-                    padding: 15px;
-                    border-radius: 4px;
-                    margin: 20px 0;
-                    word-break: break-all;
-                }}
-                .footer {{
-                    margin-top: 30px;
-                    padding-top: 20px;
-                    border-top: 1px solid #e5e7eb;
-                    text-align: center;
-                    color: #6b7280;
-                    font-size: 12px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>📱 Your eSIM Details</h1>
-            </div>
-            <div class="content">
-                <p>Here are the details for your eSIM:</p>
-                
-                <div class="detail-row">
-                    <div class="detail-label">ICCID</div>
-                    <div class="detail-value">{details.get('iccid', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Order/SIM ID</div>
-                    <div class="detail-value">{details.get('order_sim_id', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Plan Name</div>
-                    <div class="detail-value">{details.get('plan_name', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Status</div>
-                    <div class="detail-value">{details.get('status', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Purchase Date</div>
-                    <div class="detail-value">{details.get('purchase_date', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Validity</div>
-                    <div class="detail-value">{details.get('validity', 'N/A')} days</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Data Capacity</div>
-                    <div class="detail-value">{details.get('data_capacity', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Data Consumed</div>
-                    <div class="detail-value">{details.get('data_consumed', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Data Remaining</div>
-                    <div class="detail-value">{details.get('data_remaining', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">APN</div>
-                    <div class="detail-value">{details.get('apn', 'N/A')}</div>
-                </div>
-                
-                <div class="activation-code">
-                    <div class="detail-label">⚡ Activation Code</div>
-                    <div class="detail-value" style="margin-top: 10px; font-family: monospace; font-size: 12px;">
-                        {details.get('activation_code', 'N/A')}
-                    </div>
-                </div>
-                
-                <p style="margin-top: 20px; color: #6b7280; font-size: 14px;">
-                    <strong>Note:</strong> Keep this activation code secure. You'll need it to install your eSIM.
-                </p>
-            </div>
-            <div class="footer">
-                <p>This email was sent from eSIM Status Checker</p>
-                <p>© {datetime.now().year} eSIM Support. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
+    def send_esim_details_bulk(items: List[tuple], chunk_size: int = None) -> int:
         """
-        return html
-    
+        Queue eSIM details emails for many recipients in background chunks
+
+        Items are sliced into chunks of settings.ESIM_EMAIL_CHUNK_SIZE and
+        each chunk becomes one background job that shares a single SMTP
+        connection, so a post-purchase burst costs one queue entry and one
+        connection per chunk rather than per email.
+
+        Args:
+            items: List of (recipient_email, esim_details) tuples
+            chunk_size: Override for the configured chunk size (optional)
+
+        Returns:
+            int: Number of chunks queued
+        """
+        if chunk_size is None:
+            chunk_size = settings.ESIM_EMAIL_CHUNK_SIZE
+
+        from .tasks import queue_esim_email_chunk
+
+        jobs = [
+            {'recipient': recipient_email, 'kind': 'details', 'esim_details': esim_details}
+            for recipient_email, esim_details in items
+        ]
+        chunks = 0
+        for start in range(0, len(jobs), chunk_size):
+            queue_esim_email_chunk(jobs[start:start + chunk_size])
+            chunks += 1
+
+        logger.info("Queued %s emails in %s chunks", len(jobs), chunks)
+        return chunks
+
+    @staticmethod
+    def bulk_send_details(items: List[tuple]) -> int:
+        """
+        Send eSIM details emails to many recipients over one connection
+
+        Args:
+            items: List of (recipient_email, esim_details) tuples
+
+        Returns:
+            int: Number of emails sent successfully
+        """
+        sent = 0
+        with get_connection() as connection:
+            for recipient_email, esim_details in items:
+                try:
+                    ESIMEmailService.send_esim_details_email(
+                        recipient_email, esim_details, connection=connection
+                    )
+                    sent += 1
+                except EmailError as e:
+                    logger.error("Bulk send failed for %s: %s", recipient_email, e)
+
+        logger.info("Bulk details send complete: %s/%s emails sent", sent, len(items))
+        return sent
+
+    @staticmethod
+    def send_many(jobs: List[Dict[str, Any]]) -> int:
+        """
+        Send a batch of emails over a single SMTP connection
+
+        Opening one connection and reusing it amortizes the TCP/TLS/AUTH
+        handshake across the whole batch instead of paying it per email.
+
+        Args:
+            jobs: List of dicts with keys:
+                  - recipient: email address
+                  - kind: 'details' or 'renewal'
+                  - esim_details: eSIM info dict
+                  - renewal_details: renewal info dict (renewal only)
+                  - subject: optional subject override
+
+        Returns:
+            int: Number of emails sent successfully
+        """
+        send_text_alt = settings.ESIM_EMAIL_SEND_TEXT_ALT
+        messages = []
+        for job in jobs:
+            try:
+                recipient = job['recipient']
+                text_content = None
+                if job.get('kind') == 'renewal':
+                    subject = job.get('subject') or f"{settings.EMAIL_SUBJECT_PREFIX} eSIM Renewal Confirmation"
+                    sent_at = _renewal_timestamp()
+                    html_content = ESIMEmailService._create_renewal_confirmation_html(
+                        job['renewal_details'], job['esim_details'], sent_at
+                    )
+                    if send_text_alt:
+                        text_content = ESIMEmailService._create_renewal_confirmation_text(
+                            job['renewal_details'], job['esim_details'], sent_at
+                        )
+                else:
+                    subject = job.get('subject') or f"{settings.EMAIL_SUBJECT_PREFIX} Your eSIM Details"
+                    rows = _rows(job['esim_details'], _ESIM_DETAIL_FIELDS)
+                    html_content = ESIMEmailService._create_esim_details_html(job['esim_details'], rows)
+                    if send_text_alt:
+                        text_content = ESIMEmailService._create_esim_details_text(job['esim_details'])
+
+                email = ESIMEmailService._build_message(
+                    subject, recipient, html_content, text_content
+                )
+                messages.append((recipient, email))
+            except Exception as e:
+                logger.error("Failed to build email for %s: %s", job.get('recipient'), e)
+
+        sent = 0
+        with get_connection() as connection:
+            for recipient, email in messages:
+                # Send individually over the shared connection so one bad
+                # recipient doesn't abort the rest of the batch
+                try:
+                    connection.send_messages([email])
+                    sent += 1
+                except Exception as e:
+                    logger.error("Failed to send email to %s: %s", recipient, e)
+
+        logger.info("Batch send complete: %s/%s emails sent", sent, len(jobs))
+        return sent
+
+    @staticmethod
+    def _create_esim_details_html(
+        details: Dict[str, Any],
+        rows: List[tuple] = None
+    ) -> str:
+        """Create HTML content for eSIM details email"""
+        return _get_minified_template("emails/esim_details.html").render({
+            "details": details,
+            "rows": rows if rows is not None else _rows(details, _ESIM_DETAIL_FIELDS),
+            "year": _BOOT_YEAR,
+        })
+
     @staticmethod
     def _create_esim_details_text(details: Dict[str, Any]) -> str:
         """Create plain text content for eSIM details email"""
-        text = f"""
-YOUR eSIM DETAILS
-=====================================
-
-ICCID: {details.get('iccid', 'N/A')}
-Order/SIM ID: {details.get('order_sim_id', 'N/A')}
-Plan Name: {details.get('plan_name', 'N/A')}
-Status: {details.get('status', 'N/A')}
-Purchase Date: {details.get('purchase_date', 'N/A')}
-Validity: {details.get('validity', 'N/A')} days
-Data Capacity: {details.get('data_capacity', 'N/A')}
-Data Consumed: {details.get('data_consumed', 'N/A')}
-Data Remaining: {details.get('data_remaining', 'N/A')}
-APN: {details.get('apn', 'N/A')}
-
-ACTIVATION CODE:
-{details.get('activation_code', 'N/A')}
-
-Note: Keep this activation code secure. You'll need it to install your eSIM.
-
-This email was sent from eSIM Status Checker
-© {datetime.now().year} eSIM Support. All rights reserved.
-        """
-        return text.strip()
+        return _ESIM_TEXT_FMT % {
+            key: details.get(key) or 'N/A' for key in _ESIM_TEXT_KEYS
+        }
     
     @staticmethod
     def _create_renewal_confirmation_html(
         renewal_details: Dict[str, Any],
-        esim_details: Dict[str, Any]
+        esim_details: Dict[str, Any],
+        sent_at: str = None
     ) -> str:
         """Create HTML content for renewal confirmation email"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(45deg, #059669 30%, #10b981 90%);
-                    color: white;
-                    padding: 20px;
-                    border-radius: 8px 8px 0 0;
-                    text-align: center;
-                }}
-                .content {{
-                    background: #f9fafb;
-                    padding: 20px;
-                    border: 1px solid #e5e7eb;
-                    border-top: none;
-                    border-radius: 0 0 8px 8px;
-                }}
-                .success-box {{
-                    background: #d1fae5;
-                    border: 2px solid #059669;
-                    padding: 15px;
-                    border-radius: 4px;
-                    margin: 20px 0;
-                    text-align: center;
-                }}
-                .detail-row {{
-                    margin: 12px 0;
-                    padding: 10px;
-                    background: white;
-                    border-radius: 4px;
-                }}
-                .detail-label {{
-                    font-weight: bold;
-                    color: #1e3a8a;
-                }}
-                .detail-value {{
-                    margin-top: 4px;
-                    color: #4b5563;
-                }}
-                .footer {{
-                    margin-top: 30px;
-                    padding-top: 20px;
-                    border-top: 1px solid #e5e7eb;
-                    text-align: center;
-                    color: #6b7280;
-                    font-size: 12px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>✅ eSIM Renewal Confirmed!</h1>
-            </div>
-            <div class="content">
-                <div class="success-box">
-                    <h2 style="color: #059669; margin: 0;">Payment Successful!</h2>
-                    <p style="margin: 10px 0 0 0;">Your eSIM has been successfully renewed.</p>
-                </div>
-                
-                <h3>Order Details</h3>
-                <div class="detail-row">
-                    <div class="detail-label">Order ID</div>
-                    <div class="detail-value">{renewal_details.get('order_id', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Package</div>
-                    <div class="detail-value">{renewal_details.get('package_name', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Amount Paid</div>
-                    <div class="detail-value">${renewal_details.get('amount', '0.00')} {renewal_details.get('currency', 'USD')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Date</div>
-                    <div class="detail-value">{datetime.now().strftime('%B %d, %Y %I:%M %p')}</div>
-                </div>
-                
-                <h3 style="margin-top: 30px;">eSIM Details</h3>
-                <div class="detail-row">
-                    <div class="detail-label">ICCID</div>
-                    <div class="detail-value">{esim_details.get('iccid', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Plan Name</div>
-                    <div class="detail-value">{esim_details.get('plan_name', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Status</div>
-                    <div class="detail-value">{esim_details.get('status', 'N/A')}</div>
-                </div>
-                
-                <div class="detail-row">
-                    <div class="detail-label">Data Capacity</div>
-                    <div class="detail-value">{esim_details.get('data_capacity', 'N/A')}</div>
-                </div>
-                
-                <p style="margin-top: 20px; color: #6b7280; font-size: 14px;">
-                    <strong>Note:</strong> Your eSIM renewal will be active shortly. Please allow up to 10 minutes for the changes to take effect.
-                </p>
-            </div>
-            <div class="footer">
-                <p>Thank you for using eSIM Status Checker!</p>
-                <p>© {datetime.now().year} eSIM Support. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
-        """
-        return html
-    
+        return _get_minified_template("emails/renewal_confirmation.html").render({
+            "renewal": renewal_details,
+            "order_rows": _rows(renewal_details, _RENEWAL_ORDER_FIELDS),
+            "esim_rows": _rows(esim_details, _RENEWAL_ESIM_FIELDS),
+            "sent_at": sent_at or _renewal_timestamp(),
+            "year": _BOOT_YEAR,
+        })
+
     @staticmethod
     def _create_renewal_confirmation_text(
         renewal_details: Dict[str, Any],
-        esim_details: Dict[str, Any]
+        esim_details: Dict[str, Any],
+        sent_at: str = None
     ) -> str:
         """Create plain text content for renewal confirmation email"""
-        text = f"""
-eSIM RENEWAL CONFIRMED!
-=====================================
-
-✅ Payment Successful!
-Your eSIM has been successfully renewed.
-
-ORDER DETAILS
------------
-Order ID: {renewal_details.get('order_id', 'N/A')}
-Package: {renewal_details.get('package_name', 'N/A')}
-Amount Paid: ${renewal_details.get('amount', '0.00')} {renewal_details.get('currency', 'USD')}
-Date: {datetime.now().strftime('%B %d, %Y %I:%M %p')}
-
-eSIM DETAILS
------------
-ICCID: {esim_details.get('iccid', 'N/A')}
-Plan Name: {esim_details.get('plan_name', 'N/A')}
-Status: {esim_details.get('status', 'N/A')}
-Data Capacity: {esim_details.get('data_capacity', 'N/A')}
-
-Note: Your eSIM renewal will be active shortly. Please allow up to 10 minutes for the changes to take effect.
-
-Thank you for using eSIM Status Checker!
-© {datetime.now().year} eSIM Support. All rights reserved.
-        """
-        return text.strip()
+        mapping = {
+            key: renewal_details.get(key) or 'N/A'
+            for key in _RENEWAL_ORDER_KEYS
+        }
+        mapping.update(
+            (key, esim_details.get(key) or 'N/A')
+            for key in _RENEWAL_ESIM_KEYS
+        )
+        mapping['amount'] = renewal_details.get('amount') or '0.00'
+        mapping['currency'] = renewal_details.get('currency') or 'USD'
+        mapping['sent_at'] = sent_at or _renewal_timestamp()
+        return _RENEWAL_TEXT_FMT % mapping
 
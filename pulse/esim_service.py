@@ -2,25 +2,99 @@
 Service layer for eSIM status checking using the enhanced script logic
 """
 import logging
+import re
+import threading
 import time
-from typing import Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
+from django.conf import settings
 from django.utils import timezone
 
+from .models import ESIMQuery
+from .query_log import log_query
+
 logger = logging.getLogger(__name__)
 
-# Import the enhanced script functions
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Compiled once at import; matches the "N Days" fragment in plan names
+_DAYS_RE = re.compile(r'(\d+)\s*Days?', re.IGNORECASE)
+
+# Byte→GB conversion: dividing by 2**30 is an exact binary rescale, so
+# multiplying by the reciprocal produces bit-identical results with a
+# cheaper float op
+_BYTES_PER_GB = 1 << 30
+_INV_BYTES_PER_GB = 1.0 / _BYTES_PER_GB
+
+
+def _gb(num_bytes) -> str:
+    """Format a byte count as 'X.XX GB'"""
+    return f"{num_bytes * _INV_BYTES_PER_GB:.2f} GB"
+
+
+# TravelRoam timestamps repeat across ICCIDs sharing a bundle, so parsed
+# datetimes are memoized. lru_cache doesn't cache raising calls, so bad
+# inputs keep hitting the callers' except clauses.
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO-8601 timestamp, accepting a trailing 'Z'"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+@lru_cache(maxsize=4096)
+def _from_ms(timestamp_ms) -> datetime:
+    """Parse a millisecond epoch timestamp"""
+    return datetime.fromtimestamp(timestamp_ms / 1000)
+
+
+# Worker pool for batch lookups: caps how many ICCIDs are in flight at once
+# (each one fans out to the providers on script_optimized's shared pool)
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='esim-batch')
 
-# Try to use optimized version, fall back to original
-try:
+# In-process TTL cache in front of the DB-backed ESIMQuery cache. For hot
+# ICCIDs (dashboard auto-refresh) a repeat lookup becomes a dict read with
+# no DB round-trip or JSON deserialization. Entries are (expires_at, data)
+# keyed by ICCID; kept deliberately simple rather than pulling in a cache
+# library for one dict.
+_MEM_CACHE_TTL_SECONDS = 60
+_MEM_CACHE_MAX_ENTRIES = 10000
+_mem_cache: Dict[str, Tuple[float, Dict]] = {}
+_mem_cache_lock = threading.RLock()
+
+
+def _mem_cache_get(iccid: str) -> Optional[Dict]:
+    """Return cached data for the ICCID if present and unexpired"""
+    with _mem_cache_lock:
+        entry = _mem_cache.get(iccid)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if time.monotonic() >= expires_at:
+            del _mem_cache[iccid]
+            return None
+        return dict(data)
+
+
+def _mem_cache_set(iccid: str, data: Dict) -> None:
+    """Store data for the ICCID, evicting expired/oldest entries when full"""
+    with _mem_cache_lock:
+        if len(_mem_cache) >= _MEM_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for key in [k for k, (exp, _) in _mem_cache.items() if exp <= now]:
+                del _mem_cache[key]
+            if len(_mem_cache) >= _MEM_CACHE_MAX_ENTRIES:
+                oldest = min(_mem_cache, key=lambda k: _mem_cache[k][0])
+                del _mem_cache[oldest]
+        _mem_cache[iccid] = (time.monotonic() + _MEM_CACHE_TTL_SECONDS, data)
+
+# Both script modules sit next to manage.py, so they are importable without
+# mutating sys.path. Pick the fetch implementation via settings instead of
+# an import-time try/except: the parallel fan-out by default, or the
+# sequential original when USE_OPTIMIZED_FETCH is off.
+if settings.USE_OPTIMIZED_FETCH:
     from script_optimized import try_fetch_from_all_apis_parallel as try_fetch_from_all_apis
-    logger.info("Using optimized parallel API fetching")
-except ImportError:
+else:
     from script_enhanced import try_fetch_from_all_apis
-    logger.info("Using standard API fetching")
 
 from script_enhanced import (
     APIProvider,
@@ -48,11 +122,25 @@ class ESIMService:
             OrderNotFoundError: If eSIM not found in any API
             APIError: If API request fails
         """
-        start_time = time.time()
-        
+        # Monotonic integer clock: immune to wall-clock (NTP) jumps
+        start_ns = time.perf_counter_ns()
+
+        # Hot path: serve straight from the in-process cache
+        hit = _mem_cache_get(iccid)
+        if hit is not None:
+            hit['from_cache'] = True
+            return hit
+
+        # Serve from the query cache if a fresh response exists, turning a
+        # repeat lookup into one indexed DB read instead of upstream API calls
+        cached = ESIMService._get_cached_response(iccid)
+        if cached is not None:
+            _mem_cache_set(iccid, cached)
+            return cached
+
         try:
             logger.info(f"Fetching eSIM details for ICCID: {iccid}")
-            
+
             # Use the enhanced script's parallel API checking
             result = try_fetch_from_all_apis(iccid)
             
@@ -69,14 +157,28 @@ class ESIMService:
             )
             
             # Add metadata
+            now = timezone.now()
             esim_data['api_provider'] = provider.value.upper()
-            esim_data['response_time_ms'] = int((time.time() - start_time) * 1000)
-            esim_data['last_updated'] = timezone.now().isoformat()
+            esim_data['response_time_ms'] = (time.perf_counter_ns() - start_ns) // 1_000_000
+            esim_data['last_updated'] = now.isoformat()
             
             logger.info(f"Successfully fetched eSIM details from {provider.value} in {esim_data['response_time_ms']}ms")
-            
+
+            # Log the query and cache the response for subsequent lookups.
+            # The row is written by the batched background flusher; the
+            # in-process cache covers the gap until the batch lands.
+            log_query(ESIMQuery(
+                iccid=iccid,
+                api_provider=esim_data['api_provider'],
+                response_time_ms=esim_data['response_time_ms'],
+                was_successful=True,
+                cached_response=esim_data,
+                cache_expires_at=now + timedelta(seconds=settings.ESIM_CACHE_TTL_SECONDS)
+            ))
+            _mem_cache_set(iccid, esim_data)
+
             return esim_data
-            
+
         except OrderNotFoundError as e:
             logger.warning(f"eSIM not found: {e}")
             raise
@@ -87,382 +189,314 @@ class ESIMService:
             logger.exception(f"Unexpected error: {e}")
             raise APIError(f"Unexpected error occurred: {str(e)}")
     
+    @staticmethod
+    def get_esim_details_batch(iccids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch eSIM details for several ICCIDs concurrently
+
+        Cache hits are answered inline; the misses fan out on a worker pool
+        so N lookups cost roughly one provider round-trip of wall-clock time
+        instead of N.
+
+        Args:
+            iccids: ICCIDs to look up (duplicates are collapsed)
+
+        Returns:
+            Dict mapping each ICCID to its details dict, or to
+            {'error': ...} for lookups that failed or found nothing
+        """
+        results = {}
+        pending = []
+        for iccid in dict.fromkeys(iccids):
+            hit = _mem_cache_get(iccid)
+            if hit is not None:
+                hit['from_cache'] = True
+                results[iccid] = hit
+            else:
+                pending.append(iccid)
+
+        if pending:
+            futures = {
+                _BATCH_EXECUTOR.submit(ESIMService.get_esim_details, iccid): iccid
+                for iccid in pending
+            }
+            for future in as_completed(futures):
+                iccid = futures[future]
+                try:
+                    results[iccid] = future.result()
+                except (OrderNotFoundError, APIError, AuthenticationError) as e:
+                    results[iccid] = {'error': str(e)}
+
+        return results
+
+    @staticmethod
+    def _get_cached_response(iccid: str) -> Optional[Dict]:
+        """
+        Return a fresh cached response for the ICCID, or None on a miss
+
+        Uses the (iccid, cache_expires_at) index so the common dashboard
+        refresh pattern costs one indexed read instead of provider round-trips.
+        """
+        row = ESIMQuery.objects.filter(
+            iccid=iccid,
+            was_successful=True,
+            cached_response__isnull=False,
+            cache_expires_at__gt=timezone.now()
+        ).only('cached_response', 'cache_expires_at').order_by('-query_timestamp').first()
+
+        if row and row.cached_response:
+            logger.info(f"Serving cached eSIM details for ICCID: {iccid}")
+            cached = dict(row.cached_response)
+            cached['from_cache'] = True
+            return cached
+
+        return None
+
+    @classmethod
+    def invalidate(cls, iccid: str) -> None:
+        """
+        Drop all cached data for the ICCID
+
+        Called after a renewal/top-up completes so the next lookup reflects
+        the new bundle instead of serving stale cached usage.
+        """
+        with _mem_cache_lock:
+            _mem_cache.pop(iccid, None)
+        now = timezone.now()
+        ESIMQuery.objects.filter(
+            iccid=iccid, cache_expires_at__gt=now
+        ).update(cache_expires_at=now)
+        logger.info(f"Invalidated cached eSIM details for ICCID: {iccid}")
+
     @staticmethod
     def _extract_esim_data(provider, order, activation, esimcard_data, usage_data,
                           travelroam_data, travelroam_bundles, travelroam_location) -> Dict:
         """
         Extract and MERGE eSIM data from ALL available APIs
         This mirrors the logic in script_enhanced.py's display_esim_summary()
+
+        Each phase is guarded by its payload, so in the common
+        single-provider case (the short-circuited parallel fetch usually
+        returns one provider's data) only that provider's phase runs; the
+        others cost a truthiness check. Fields live in locals while merging
+        (each payload key is fetched once, each field written without a
+        dict subscript); the result dict is built once on return.
         """
-        import re
-        from datetime import datetime
-        
-        # Initialize merged data structure
-        merged = {
-            'order_sim_id': 'N/A',
-            'iccid': 'N/A',
-            'plan_name': 'N/A',
-            'status': 'N/A',
-            'purchase_date': 'N/A',
-            'validity': 'N/A',
-            'data_capacity': 'N/A',
-            'data_consumed': 'N/A',
-            'data_remaining': 'N/A',
-            'activation_code': 'N/A',
-            'apn': 'N/A',
-        }
-        
+        order_sim_id = iccid = plan_name = status = purchase_date = validity = 'N/A'
+        data_capacity = data_consumed = data_remaining = activation_code = apn = 'N/A'
+
         # ==== PHASE 1: Extract from AirHub if available ====
         if order:
-            merged['order_sim_id'] = order.get('orderId', merged['order_sim_id'])
-            merged['iccid'] = order.get('simID') or order.get('iccid') or order.get('ICCID') or merged['iccid']
-            merged['plan_name'] = order.get('planName', merged['plan_name'])
-            merged['status'] = 'Active' if order.get('isActive') else 'Inactive'
-            merged['purchase_date'] = order.get('purchaseDate', merged['purchase_date'])
-            merged['validity'] = f"{order.get('vaildity', 'N/A')}" if order.get('vaildity') else merged['validity']
-            
-            capacity = order.get('capacity')
+            get = order.get
+            order_sim_id = get('orderId', order_sim_id)
+            iccid = get('simID') or get('iccid') or get('ICCID') or iccid
+            plan_name = get('planName', plan_name)
+            status = 'Active' if get('isActive') else 'Inactive'
+            purchase_date = get('purchaseDate', purchase_date)
+
+            vaildity = get('vaildity')
+            if vaildity:
+                validity = str(vaildity)
+
+            capacity = get('capacity')
             if capacity and capacity != 'N/A':
-                capacity_unit = order.get('capacityUnit', 'GB')
-                merged['data_capacity'] = f"{capacity} {capacity_unit}"
-            
-            if order.get('dataConsumed'):
-                merged['data_consumed'] = order.get('dataConsumed')
-            if order.get('dataRemaining'):
-                merged['data_remaining'] = order.get('dataRemaining')
-        
+                data_capacity = f"{capacity} {get('capacityUnit', 'GB')}"
+
+            consumed = get('dataConsumed')
+            if consumed:
+                data_consumed = consumed
+            remaining = get('dataRemaining')
+            if remaining:
+                data_remaining = remaining
+
         if activation:
-            if activation.get('activationCode') and merged['activation_code'] == 'N/A':
-                merged['activation_code'] = activation.get('activationCode')
-            if activation.get('apn') and merged['apn'] == 'N/A':
-                merged['apn'] = activation.get('apn')
-        
+            act_code = activation.get('activationCode')
+            if act_code and activation_code == 'N/A':
+                activation_code = act_code
+            act_apn = activation.get('apn')
+            if act_apn and apn == 'N/A':
+                apn = act_apn
+
         # ==== PHASE 2: Merge eSIMCard data (can override) ====
         if esimcard_data:
             # NEW OPTIMIZED FORMAT: Direct ICCID lookup returns complete data
             sim_data = esimcard_data.get('esim', {})  # Changed from 'sim' to 'esim'
             in_use_packages = esimcard_data.get('packages', [])  # Changed from 'assigned_packages' to 'packages'
             overall_usage = esimcard_data.get('usage', {})
-            
-            if merged['order_sim_id'] == 'N/A':
-                merged['order_sim_id'] = str(sim_data.get('id', merged['order_sim_id']))
-            
-            if merged['iccid'] == 'N/A':
-                merged['iccid'] = sim_data.get('iccid', merged['iccid'])
-            
-            if sim_data.get('last_bundle'):
-                merged['plan_name'] = sim_data.get('last_bundle')
-            
-            if sim_data.get('status'):
-                esim_status = sim_data.get('status')
-                if merged['status'] == 'N/A' or merged['status'] != esim_status:
-                    merged['status'] = esim_status
-            
-            if sim_data.get('created_at'):
-                merged['purchase_date'] = sim_data.get('created_at')
-            
+            get = sim_data.get
+
+            if order_sim_id == 'N/A':
+                order_sim_id = str(get('id', order_sim_id))
+
+            if iccid == 'N/A':
+                iccid = get('iccid', iccid)
+
+            last_bundle = get('last_bundle')
+            if last_bundle:
+                plan_name = last_bundle
+
+            esim_status = get('status')
+            if esim_status and (status == 'N/A' or status != esim_status):
+                status = esim_status
+
+            created_at = get('created_at')
+            if created_at:
+                purchase_date = created_at
+
             activation_code_esim = (
-                sim_data.get('qr_code_text') or
-                sim_data.get('qr_code') or
-                sim_data.get('activation_code') or
-                sim_data.get('lpa')
+                get('qr_code_text') or
+                get('qr_code') or
+                get('activation_code') or
+                get('lpa')
             )
-            if activation_code_esim and merged['activation_code'] == 'N/A':
-                merged['activation_code'] = activation_code_esim
-            
-            if sim_data.get('apn') and merged['apn'] == 'N/A':
-                merged['apn'] = sim_data.get('apn')
-            
+            if activation_code_esim and activation_code == 'N/A':
+                activation_code = activation_code_esim
+
+            sim_apn = get('apn')
+            if sim_apn and apn == 'N/A':
+                apn = sim_apn
+
             # Use in_use_packages (active packages) instead of assigned_packages
             if in_use_packages:
-                package = in_use_packages[0]
-                
-                if package.get('initial_data_quantity'):
-                    capacity = package.get('initial_data_quantity')
-                    capacity_unit = package.get('initial_data_unit', 'GB')
-                    merged['data_capacity'] = f"{capacity} {capacity_unit}"
-                
-                if merged['plan_name'] and 'Days' in merged['plan_name']:
-                    match = re.search(r'(\d+)\s*Days?', merged['plan_name'], re.IGNORECASE)
+                get = in_use_packages[0].get
+
+                capacity = get('initial_data_quantity')
+                if capacity:
+                    data_capacity = f"{capacity} {get('initial_data_unit', 'GB')}"
+
+                if plan_name and 'Days' in plan_name:
+                    match = _DAYS_RE.search(plan_name)
                     if match:
-                        merged['validity'] = f"{match.group(1)} days"
-                
-                initial_data = package.get('initial_data_quantity', 0)
-                remaining_data = package.get('rem_data_quantity', 0)
-                data_unit = package.get('rem_data_unit', 'GB')
-                
+                        validity = f"{match.group(1)} days"
+
+                initial_data = get('initial_data_quantity', 0)
+                remaining_data = get('rem_data_quantity', 0)
+                data_unit = get('rem_data_unit', 'GB')
+
                 if initial_data and remaining_data is not None:
                     try:
                         consumed = float(initial_data) - float(remaining_data)
-                        merged['data_consumed'] = f"{consumed:.2f} {data_unit}"
-                        merged['data_remaining'] = f"{remaining_data} {data_unit}"
+                        data_consumed = f"{consumed:.2f} {data_unit}"
+                        data_remaining = f"{remaining_data} {data_unit}"
                     except (ValueError, TypeError):
                         pass
-            
+
             # Also use overall_usage if available
             elif overall_usage:
-                initial_data = overall_usage.get('initial_data_quantity', 0)
-                remaining_data = overall_usage.get('rem_data_quantity', 0)
-                data_unit = overall_usage.get('rem_data_unit', 'GB')
-                
+                get = overall_usage.get
+                initial_data = get('initial_data_quantity', 0)
+                remaining_data = get('rem_data_quantity', 0)
+                data_unit = get('rem_data_unit', 'GB')
+
                 if initial_data:
-                    merged['data_capacity'] = f"{initial_data} {data_unit}"
+                    data_capacity = f"{initial_data} {data_unit}"
                 if remaining_data is not None:
-                    merged['data_remaining'] = f"{remaining_data} {data_unit}"
+                    data_remaining = f"{remaining_data} {data_unit}"
                 if initial_data and remaining_data is not None:
                     try:
                         consumed = float(initial_data) - float(remaining_data)
-                        merged['data_consumed'] = f"{consumed:.2f} {data_unit}"
+                        data_consumed = f"{consumed:.2f} {data_unit}"
                     except (ValueError, TypeError):
                         pass
-        
+
         # ==== PHASE 3: Merge TravelRoam data (can override) ====
         if travelroam_data:
-            if merged['order_sim_id'] == 'N/A':
-                merged['order_sim_id'] = str(travelroam_data.get('matchingId', merged['order_sim_id']))
-            
-            if merged['iccid'] == 'N/A':
-                merged['iccid'] = travelroam_data.get('iccid', merged['iccid'])
-            
-            if travelroam_data.get('profileStatus'):
-                tr_status = travelroam_data.get('profileStatus')
-                if merged['status'] == 'N/A':
-                    merged['status'] = tr_status
-            
-            if travelroam_data.get('smdpAddress') and merged['activation_code'] == 'N/A':
-                merged['activation_code'] = travelroam_data.get('smdpAddress')
-            
-            purchase_date_timestamp = travelroam_data.get('firstInstalledDateTime')
-            if purchase_date_timestamp and merged['purchase_date'] == 'N/A':
+            get = travelroam_data.get
+
+            if order_sim_id == 'N/A':
+                order_sim_id = str(get('matchingId', order_sim_id))
+
+            if iccid == 'N/A':
+                iccid = get('iccid', iccid)
+
+            tr_status = get('profileStatus')
+            if tr_status and status == 'N/A':
+                status = tr_status
+
+            smdp_address = get('smdpAddress')
+            if smdp_address and activation_code == 'N/A':
+                activation_code = smdp_address
+
+            purchase_date_timestamp = get('firstInstalledDateTime')
+            if purchase_date_timestamp and purchase_date == 'N/A':
                 try:
-                    dt = datetime.fromtimestamp(purchase_date_timestamp / 1000)
-                    merged['purchase_date'] = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
+                    dt = _from_ms(purchase_date_timestamp)
+                    purchase_date = dt.strftime('%Y-%m-%d %H:%M:%S')
+                except (ValueError, TypeError, OSError, OverflowError):
                     pass
-        
+
         if travelroam_bundles and travelroam_bundles.get('bundles'):
             bundles = travelroam_bundles['bundles']
             if bundles:
                 first_bundle = bundles[0]
-                
+
                 plan_name_tr = first_bundle.get('description') or first_bundle.get('name')
-                if plan_name_tr and merged['plan_name'] == 'N/A':
-                    merged['plan_name'] = plan_name_tr
-                
+                if plan_name_tr and plan_name == 'N/A':
+                    plan_name = plan_name_tr
+
                 assignments = first_bundle.get('assignments', [])
                 for assignment in assignments:
                     if assignment.get('callTypeGroup', '').lower() == 'data':
-                        initial_bytes = assignment.get('initialQuantity', 0)
-                        remaining_bytes = assignment.get('remainingQuantity', 0)
-                        
+                        get = assignment.get
+                        initial_bytes = get('initialQuantity', 0)
+                        remaining_bytes = get('remainingQuantity', 0)
+
                         if initial_bytes > 0:
-                            initial_gb = initial_bytes / (1024 ** 3)
-                            remaining_gb = remaining_bytes / (1024 ** 3)
-                            consumed_gb = initial_gb - remaining_gb
-                            
                             # OVERRIDE if current data is N/A
-                            if merged['data_consumed'] == 'N/A' or merged['data_remaining'] == 'N/A':
-                                merged['data_capacity'] = f"{initial_gb:.2f} GB"
-                                merged['data_consumed'] = f"{consumed_gb:.2f} GB"
-                                merged['data_remaining'] = f"{remaining_gb:.2f} GB"
-                            
-                            start_time = assignment.get('startTime', '')
-                            end_time = assignment.get('endTime', '')
+                            if data_consumed == 'N/A' or data_remaining == 'N/A':
+                                data_capacity = _gb(initial_bytes)
+                                data_consumed = _gb(initial_bytes - remaining_bytes)
+                                data_remaining = _gb(remaining_bytes)
+
+                            start_time = get('startTime', '')
+                            end_time = get('endTime', '')
                             if start_time and end_time:
                                 try:
-                                    start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                                    end = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-                                    
+                                    start = _parse_iso(start_time)
+                                    end = _parse_iso(end_time)
+
                                     # Calculate validity
-                                    if merged['validity'] == 'N/A':
-                                        merged['validity'] = f"{(end - start).days} days"
-                                    
+                                    if validity == 'N/A':
+                                        validity = f"{(end - start).days} days"
+
                                     # Check if bundle has expired
                                     now = datetime.now(end.tzinfo)
                                     if now > end:
-                                        merged['status'] = 'Expired'
+                                        status = 'Expired'
                                         logger.info(f"Bundle expired on {end_time}, setting status to Expired")
                                 except Exception as e:
                                     logger.warning(f"Error parsing bundle dates: {e}")
                                     pass
                         break
-        
+
         if travelroam_location and travelroam_location.get('networkName'):
             network_name = travelroam_location.get('networkName', '')
             network_brand = travelroam_location.get('networkBrandName', '')
             country = travelroam_location.get('country', '')
-            
+
             if network_name or network_brand:
                 apn_from_location = f"{network_name or network_brand} ({country})" if country else (network_name or network_brand)
-                if merged['apn'] in ['N/A', 'internet', 'wholesale']:
-                    merged['apn'] = apn_from_location
-        
-        return merged
-    
-    @staticmethod
-    def _extract_airhub_data(order: Dict, activation: Dict) -> Dict:
-        """Extract data from AirHub API response"""
-        iccid = (
-            order.get('simID') or 
-            order.get('iccid') or 
-            order.get('ICCID') or 
-            activation.get('iccid') or 
-            'N/A'
-        )
-        
-        return {
-            'order_sim_id': str(order.get('orderId', 'N/A')),
-            'iccid': iccid,
-            'plan_name': order.get('planName', 'N/A'),
-            'status': 'Active' if order.get('isActive') else 'Inactive',
-            'purchase_date': order.get('purchaseDate', 'N/A'),
-            'validity': f"{order.get('vaildity', 'N/A')} days",
-            'data_capacity': f"{order.get('capacity', 'N/A')} {order.get('capacityUnit', '')}".strip(),
-            'data_consumed': order.get('dataConsumed', 'N/A'),
-            'data_remaining': order.get('dataRemaining', 'N/A'),
-            'activation_code': activation.get('activationCode', 'N/A') if activation else 'N/A',
-            'apn': activation.get('apn', 'N/A') if activation else 'N/A',
-        }
-    
-    @staticmethod
-    def _extract_esimcard_data(order: Dict, esimcard_data: Dict, usage_data: Dict) -> Dict:
-        """Extract data from eSIMCard API response"""
-        sim_data = esimcard_data.get('sim', {}) if esimcard_data else {}
-        assigned_packages = esimcard_data.get('assigned_packages', []) if esimcard_data else []
-        
-        plan_name = sim_data.get('last_bundle', 'N/A')
-        
-        # Get package data
-        package = assigned_packages[0] if assigned_packages else None
-        
-        if package:
-            capacity = f"{package.get('initial_data_quantity', 'N/A')} {package.get('initial_data_unit', 'GB')}"
-            
-            # Extract validity from plan name
-            import re
-            validity = 'N/A days'
-            if plan_name and 'Days' in plan_name:
-                match = re.search(r'(\d+)\s*Days?', plan_name, re.IGNORECASE)
-                if match:
-                    validity = f"{match.group(1)} days"
-            
-            # Calculate data consumed/remaining
-            initial_data = package.get('initial_data_quantity', 0)
-            remaining_data = package.get('rem_data_quantity', 0)
-            data_unit = package.get('rem_data_unit', 'GB')
-            
-            if initial_data and remaining_data is not None:
-                consumed = float(initial_data) - float(remaining_data)
-                data_consumed = f"{consumed:.2f} {data_unit}"
-                data_remaining = f"{remaining_data} {data_unit}"
-            else:
-                data_consumed = 'N/A'
-                data_remaining = 'N/A'
-        else:
-            capacity = 'N/A'
-            validity = 'N/A days'
-            data_consumed = 'N/A'
-            data_remaining = 'N/A'
-        
-        return {
-            'order_sim_id': sim_data.get('id', 'N/A'),
-            'iccid': sim_data.get('iccid', 'N/A'),
-            'plan_name': plan_name,
-            'status': sim_data.get('status', 'Unknown'),
-            'purchase_date': sim_data.get('created_at', 'N/A'),
-            'validity': validity,
-            'data_capacity': capacity,
-            'data_consumed': data_consumed,
-            'data_remaining': data_remaining,
-            'activation_code': (
-                sim_data.get('qr_code_text') or
-                sim_data.get('qr_code') or
-                'N/A'
-            ),
-            'apn': sim_data.get('apn', 'N/A'),
-        }
-    
-    @staticmethod
-    def _extract_travelroam_data(travelroam_data: Dict, travelroam_bundles: Dict, 
-                                 travelroam_location: Dict) -> Dict:
-        """Extract data from TravelRoam API response"""
-        
-        order_id = travelroam_data.get('matchingId', 'N/A') if travelroam_data else 'N/A'
-        iccid = travelroam_data.get('iccid', 'N/A') if travelroam_data else 'N/A'
-        status = travelroam_data.get('profileStatus', 'Unknown') if travelroam_data else 'Unknown'
-        
-        # Get plan name and data from bundles
-        plan_name = 'N/A'
-        capacity = 'N/A'
-        validity = 'N/A days'
-        data_consumed = 'N/A'
-        data_remaining = 'N/A'
-        
-        if travelroam_bundles and travelroam_bundles.get('bundles'):
-            bundles = travelroam_bundles['bundles']
-            if bundles:
-                first_bundle = bundles[0]
-                plan_name = first_bundle.get('description') or first_bundle.get('name', 'N/A')
-                
-                assignments = first_bundle.get('assignments', [])
-                if assignments:
-                    for assignment in assignments:
-                        if assignment.get('callTypeGroup', '').lower() == 'data':
-                            initial_bytes = assignment.get('initialQuantity', 0)
-                            remaining_bytes = assignment.get('remainingQuantity', 0)
-                            
-                            if initial_bytes > 0:
-                                initial_gb = initial_bytes / (1024 ** 3)
-                                remaining_gb = remaining_bytes / (1024 ** 3)
-                                consumed_gb = initial_gb - remaining_gb
-                                
-                                capacity = f"{initial_gb:.2f} GB"
-                                data_consumed = f"{consumed_gb:.2f} GB"
-                                data_remaining = f"{remaining_gb:.2f} GB"
-                            
-                            # Calculate validity
-                            start_time = assignment.get('startTime', '')
-                            end_time = assignment.get('endTime', '')
-                            if start_time and end_time:
-                                try:
-                                    from datetime import datetime
-                                    start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                                    end = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-                                    days = (end - start).days
-                                    validity = f"{days} days"
-                                except:
-                                    pass
-                            break
-        
-        # Format purchase date
-        purchase_date = 'N/A'
-        purchase_date_timestamp = travelroam_data.get('firstInstalledDateTime') if travelroam_data else None
-        if purchase_date_timestamp:
-            try:
-                dt = datetime.fromtimestamp(purchase_date_timestamp / 1000)
-                purchase_date = dt.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                purchase_date = str(purchase_date_timestamp)
-        
-        # Get APN from location
-        apn = 'internet'
-        if travelroam_location and travelroam_location.get('networkName'):
-            network_name = travelroam_location.get('networkName', '')
-            country = travelroam_location.get('country', '')
-            if network_name:
-                apn = f"{network_name} ({country})" if country else network_name
-        
+                if apn in ['N/A', 'internet', 'wholesale']:
+                    apn = apn_from_location
+
         return {
-            'order_sim_id': order_id,
+            'order_sim_id': order_sim_id,
             'iccid': iccid,
             'plan_name': plan_name,
             'status': status,
             'purchase_date': purchase_date,
             'validity': validity,
-            'data_capacity': capacity,
+            'data_capacity': data_capacity,
             'data_consumed': data_consumed,
             'data_remaining': data_remaining,
-            'activation_code': travelroam_data.get('smdpAddress', 'N/A') if travelroam_data else 'N/A',
+            'activation_code': activation_code,
             'apn': apn,
         }
 
+
+# Module-level aliases: ESIMService is a namespace of staticmethods, so hot
+# callers can bind the function once (one LOAD_GLOBAL per call) instead of
+# going through the class attribute on every request
+get_esim_details = ESIMService.get_esim_details
+get_esim_details_batch = ESIMService.get_esim_details_batch
+invalidate_esim_cache = ESIMService.invalidate
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.26 on 2026-08-29 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse', '0002_renewalpackage_renewalorder_paymenttransaction'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='renewalorder',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending Payment'), ('PAID', 'Payment Confirmed'), ('PROCESSING', 'Processing with Provider'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('PROVIDER_FAILED', 'Payment Successful - Provider Processing Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='esimquery',
+            index=models.Index(fields=['iccid', 'cache_expires_at'], name='pulse_esimq_iccid_5976e7_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.26 on 2026-08-29 00:37
+
+from django.db import migrations
+import pulse.orjson_field
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse', '0003_alter_renewalorder_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='esimquery',
+            name='cached_response',
+            field=pulse.orjson_field.ORJSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymenttransaction',
+            name='raw_response',
+            field=pulse.orjson_field.ORJSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='renewalorder',
+            name='provider_response',
+            field=pulse.orjson_field.ORJSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.26 on 2026-08-29 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse', '0004_alter_esimquery_cached_response_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='esimquery',
+            name='pulse_esimq_iccid_5976e7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='esimquery',
+            index=models.Index(condition=models.Q(('cached_response__isnull', False)), fields=['iccid', '-cache_expires_at'], name='esimq_cache_lookup'),
+        ),
+        migrations.AddIndex(
+            model_name='esimquery',
+            index=models.Index(fields=['iccid', 'was_successful', '-query_timestamp'], name='pulse_esimq_iccid_daf216_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.26 on 2026-08-29 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse', '0005_remove_esimquery_pulse_esimq_iccid_5976e7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_capacity',
+        ),
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_capacity_unit',
+        ),
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_consumed',
+        ),
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_consumed_unit',
+        ),
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_remaining',
+        ),
+        migrations.RemoveField(
+            model_name='esimdetails',
+            name='data_remaining_unit',
+        ),
+        migrations.AddField(
+            model_name='esimdetails',
+            name='data_capacity_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='esimdetails',
+            name='data_consumed_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='esimdetails',
+            name='data_remaining_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
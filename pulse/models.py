@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from .orjson_field import ORJSONField
+
 
 class ESIMQuery(models.Model):
     """Model to track eSIM queries for analytics"""
@@ -19,13 +21,22 @@ class ESIMQuery(models.Model):
     error_message = models.TextField(null=True, blank=True)
     
     # Cache the response for quick retrieval
-    cached_response = models.JSONField(null=True, blank=True)
+    cached_response = ORJSONField(null=True, blank=True)
     cache_expires_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-query_timestamp']
         indexes = [
             models.Index(fields=['iccid', '-query_timestamp']),
+            # Covers the cache lookup in ESIMService._get_cached_response;
+            # partial so rows without a cached payload never bloat it
+            models.Index(
+                fields=['iccid', '-cache_expires_at'],
+                name='esimq_cache_lookup',
+                condition=models.Q(cached_response__isnull=False),
+            ),
+            # Covers per-ICCID success/history queries
+            models.Index(fields=['iccid', 'was_successful', '-query_timestamp']),
         ]
     
     def __str__(self):
@@ -56,12 +67,12 @@ class ESIMDetails(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
     purchase_date = models.CharField(max_length=50, blank=True)
     validity_days = models.IntegerField(null=True, blank=True)
-    data_capacity = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    data_capacity_unit = models.CharField(max_length=10, default='GB')
-    data_consumed = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    data_consumed_unit = models.CharField(max_length=10, default='GB')
-    data_remaining = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    data_remaining_unit = models.CharField(max_length=10, default='GB')
+    # Data amounts are stored as raw byte counts: integers are cheaper than
+    # Decimal to write and aggregate, and unit columns become unnecessary.
+    # Use the *_gb properties for display.
+    data_capacity_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    data_consumed_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    data_remaining_bytes = models.PositiveBigIntegerField(null=True, blank=True)
     activation_code = models.TextField(blank=True)
     apn = models.CharField(max_length=255, blank=True)
     
@@ -72,10 +83,28 @@ class ESIMDetails(models.Model):
     class Meta:
         verbose_name_plural = "eSIM Details"
         ordering = ['-last_updated']
-    
+
     def __str__(self):
         return f"{self.iccid} - {self.plan_name}"
 
+    @property
+    def data_capacity_gb(self):
+        if self.data_capacity_bytes is None:
+            return None
+        return self.data_capacity_bytes / (1 << 30)
+
+    @property
+    def data_consumed_gb(self):
+        if self.data_consumed_bytes is None:
+            return None
+        return self.data_consumed_bytes / (1 << 30)
+
+    @property
+    def data_remaining_gb(self):
+        if self.data_remaining_bytes is None:
+            return None
+        return self.data_remaining_bytes / (1 << 30)
+
 
 class RenewalPackage(models.Model):
     """Model to store available renewal packages from different providers"""
@@ -138,7 +167,7 @@ class RenewalOrder(models.Model):
     
     # Provider response
     provider_order_id = models.CharField(max_length=255, blank=True)
-    provider_response = models.JSONField(null=True, blank=True)
+    provider_response = ORJSONField(null=True, blank=True)
     
     # Email details
     customer_email = models.EmailField(blank=True)
@@ -183,7 +212,7 @@ class PaymentTransaction(models.Model):
     # Metadata
     payment_method = models.CharField(max_length=50, blank=True)
     error_message = models.TextField(blank=True)
-    raw_response = models.JSONField(null=True, blank=True)
+    raw_response = ORJSONField(null=True, blank=True)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,38 @@
+"""
+orjson-backed JSONField
+
+Django's JSONField round-trips through the pure-Python json module on every
+read and write. The API response payloads stored in cached_response /
+provider_response / raw_response are deep dicts, so swapping the codec for
+orjson (a C extension) cuts most of the (de)serialization CPU per query.
+"""
+import orjson
+from django.db import models
+
+
+def _default(value):
+    """Fallback for types orjson doesn't handle natively (e.g. Decimal)"""
+    return str(value)
+
+
+class ORJSONField(models.JSONField):
+    """JSONField that (de)serializes with orjson instead of stdlib json"""
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or hasattr(value, "as_sql"):
+            return super().get_db_prep_value(value, connection, prepared=True)
+        return orjson.dumps(value, default=_default).decode()
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        # Some backends hand back values already extracted from their SQL
+        # datatypes (e.g. SQLite key transforms, native jsonb)
+        if not isinstance(value, (str, bytes)):
+            return value
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return value
@@ -4,37 +4,104 @@ Handles payment processing for eSIM renewals
 """
 
 import stripe
+import functools
 import logging
+import uuid
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.core.cache import cache
 from typing import Dict, Any
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 
 logger = logging.getLogger(__name__)
 
 # Configure Stripe
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+# One pooled keep-alive client for every Stripe call: reusing connections
+# skips the 100-200ms TCP+TLS handshake after the first request, and the
+# SDK's network retries absorb transient 5xx/connection errors.
+_stripe_session = requests.Session()
+_stripe_session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+stripe.default_http_client = stripe.RequestsClient(session=_stripe_session)
+stripe.max_network_retries = 2
+
+# Terminal Stripe objects never change, so repeat retrievals (success-page
+# reloads, webhook retries, concurrent tabs) can be served from the cache
+# instead of a ~500ms API round-trip. Non-terminal states are never cached.
+_TERMINAL_INTENT_STATUSES = ('succeeded', 'canceled')
+_TERMINAL_CACHE_TTL_SECONDS = 86400
+
+# Defaults resolved once at import instead of per call; a misconfigured
+# FRONTEND_URL surfaces at worker boot rather than on the first checkout
+_DEFAULT_CURRENCY = settings.STRIPE_CURRENCY.lower()
+_DEFAULT_SUCCESS_URL = f'{settings.FRONTEND_URL}/renewal/success?session_id={{CHECKOUT_SESSION_ID}}'
+_DEFAULT_CANCEL_URL = f'{settings.FRONTEND_URL}/renewal/cancelled'
+_WEBHOOK_SECRET = settings.STRIPE_WEBHOOK_SECRET
+
+
+# Dedicated pool for bulk sweeps (expiry cancellations, mass refunds) so
+# they overlap Stripe round-trips without monopolizing request threads.
+# Eight workers keeps fan-out well under Stripe's rate limits.
+_BULK_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='stripe-bulk')
+
+
+def _to_minor_units(amount: Decimal) -> int:
+    """
+    Convert a major-unit amount to integer cents for Stripe
+
+    int(amount * 100) truncates, silently dropping sub-cent precision;
+    this rounds half-up instead.
+    """
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
 
 class PaymentError(Exception):
     """Custom exception for payment errors"""
     pass
 
 
+def _stripe_call(action: str):
+    """
+    Shared error handling for Stripe-calling methods
+
+    Catches StripeError once, logs it with the traceback, and re-raises as
+    PaymentError('Failed to <action>: ...') — instead of repeating the same
+    try/except/log block in every method.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except stripe.error.StripeError as e:
+                logger.error("Stripe error (%s): %s", action, e, exc_info=True)
+                raise PaymentError(f"Failed to {action}: {str(e)}")
+        return wrapper
+    return decorator
+
+
 class StripePaymentService:
     """Service for handling Stripe payments"""
     
     @staticmethod
+    @_stripe_call("create checkout session")
     def create_checkout_session(
         amount: Decimal,
-        currency: str = None,
+        currency: str = _DEFAULT_CURRENCY,
         metadata: Dict[str, Any] = None,
-        success_url: str = None,
-        cancel_url: str = None,
-        customer_email: str = None
+        success_url: str = _DEFAULT_SUCCESS_URL,
+        cancel_url: str = _DEFAULT_CANCEL_URL,
+        customer_email: str = None,
+        idempotency_key: str = None
     ) -> Dict[str, Any]:
         """
         Create a Stripe Checkout Session
-        
+
         Args:
             amount: Amount to charge (in base currency units, e.g., dollars)
             currency: Currency code (default: USD)
@@ -42,284 +109,340 @@ class StripePaymentService:
             success_url: URL to redirect to after successful payment
             cancel_url: URL to redirect to if payment is cancelled
             customer_email: Pre-fill customer email
-            
+            idempotency_key: Key Stripe uses to collapse retries; derived
+                from the order when omitted
+
         Returns:
             Dict containing checkout session details including url
             
         Raises:
             PaymentError: If checkout session creation fails
         """
-        if currency is None:
-            currency = settings.STRIPE_CURRENCY.lower()
-        
-        frontend_url = settings.FRONTEND_URL
-        
-        if success_url is None:
-            success_url = f'{frontend_url}/renewal/success?session_id={{CHECKOUT_SESSION_ID}}'
-        
-        if cancel_url is None:
-            cancel_url = f'{frontend_url}/renewal/cancelled'
-        
         # Convert amount to cents (Stripe requires smallest currency unit)
-        amount_cents = int(amount * 100)
-        
-        try:
-            logger.info(f"Creating Stripe checkout session for ${amount} {currency}")
-            
-            session_params = {
-                'payment_method_types': ['card'],
-                'line_items': [{
-                    'price_data': {
-                        'currency': currency,
-                        'product_data': {
-                            'name': 'eSIM Bundle Renewal',
-                            'description': metadata.get('package_name', 'eSIM Data Package') if metadata else 'eSIM Data Package',
-                        },
-                        'unit_amount': amount_cents,
+        amount_cents = _to_minor_units(amount)
+
+        logger.info("Creating Stripe checkout session for $%s %s", amount, currency)
+
+        session_params = {
+            'payment_method_types': ['card'],
+            'line_items': [{
+                'price_data': {
+                    'currency': currency,
+                    'product_data': {
+                        'name': 'eSIM Bundle Renewal',
+                        'description': metadata.get('package_name', 'eSIM Data Package') if metadata else 'eSIM Data Package',
                     },
-                    'quantity': 1,
-                }],
-                'mode': 'payment',
-                'success_url': success_url,
-                'cancel_url': cancel_url,
-                'metadata': metadata or {},
-            }
-            
-            if customer_email:
-                session_params['customer_email'] = customer_email
-            
-            checkout_session = stripe.checkout.Session.create(**session_params)
-            
-            logger.info(f"Checkout session created: {checkout_session.id}")
-            
-            return {
-                'id': checkout_session.id,
-                'url': checkout_session.url,
-                'status': checkout_session.status,
-                'amount': float(amount),
-                'currency': str(currency),
-                'payment_status': checkout_session.payment_status,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error creating checkout session: {e}")
-            raise PaymentError(f"Failed to create checkout session: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error creating checkout session: {e}")
-            raise PaymentError(f"Unexpected error: {str(e)}")
+                    'unit_amount': amount_cents,
+                },
+                'quantity': 1,
+            }],
+            'mode': 'payment',
+            'success_url': success_url,
+            'cancel_url': cancel_url,
+            'metadata': metadata or {},
+        }
+
+        if customer_email:
+            session_params['customer_email'] = customer_email
+
+        # A retried create (double-click, network blip) returns the
+        # original session instead of opening a duplicate
+        if idempotency_key is None:
+            order_id = (metadata or {}).get('order_id')
+            idempotency_key = f'checkout:{order_id}' if order_id else uuid.uuid4().hex
+
+        checkout_session = stripe.checkout.Session.create(
+            **session_params, idempotency_key=idempotency_key
+        )
+
+        logger.info("Checkout session created: %s", checkout_session.id)
+
+        return {
+            'id': checkout_session.id,
+            'url': checkout_session.url,
+            'status': checkout_session.status,
+            'amount': float(amount),
+            'currency': str(currency),
+            'payment_status': checkout_session.payment_status,
+        }
     
     @staticmethod
+    @_stripe_call("retrieve checkout session")
     def retrieve_checkout_session(session_id: str) -> Dict[str, Any]:
         """
         Retrieve a Stripe Checkout Session
-        
+
         Args:
             session_id: Stripe Checkout Session ID
-            
+
         Returns:
             Dict containing checkout session details
-            
+
         Raises:
             PaymentError: If retrieval fails
         """
-        try:
-            logger.info(f"Retrieving checkout session: {session_id}")
-            
-            session = stripe.checkout.Session.retrieve(session_id)
-            
-            return {
-                'id': session.id,
-                'status': session.status,
-                'payment_status': session.payment_status,
-                'amount_total': session.amount_total / 100 if session.amount_total else 0,
-                'currency': session.currency,
-                'payment_intent': session.payment_intent,
-                'metadata': session.metadata,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error retrieving checkout session: {e}")
-            raise PaymentError(f"Failed to retrieve checkout session: {str(e)}")
+        cache_key = f'stripe:cs:{session_id}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        logger.info("Retrieving checkout session: %s", session_id)
+
+        session = stripe.checkout.Session.retrieve(session_id)
+
+        result = {
+            'id': session.id,
+            'status': session.status,
+            'payment_status': session.payment_status,
+            'amount_total': Decimal(session.amount_total) / 100 if session.amount_total else Decimal('0'),
+            'currency': session.currency,
+            'payment_intent': session.payment_intent,
+            'metadata': session.metadata,
+        }
+
+        # A session can be 'complete' while an async payment method is still
+        # settling (payment_status stays 'unpaid'), so only cache once the
+        # body can no longer change: expired, or complete and actually paid
+        if session.status == 'expired' or (
+                session.status == 'complete' and session.payment_status == 'paid'):
+            cache.set(cache_key, result, _TERMINAL_CACHE_TTL_SECONDS)
+
+        return result
     
     @staticmethod
+    @_stripe_call("create payment intent")
     def create_payment_intent(
         amount: Decimal,
-        currency: str = None,
-        metadata: Dict[str, Any] = None
+        currency: str = _DEFAULT_CURRENCY,
+        metadata: Dict[str, Any] = None,
+        idempotency_key: str = None
     ) -> Dict[str, Any]:
         """
         Create a Stripe Payment Intent (kept for backward compatibility)
-        
+
         Args:
             amount: Amount to charge (in base currency units, e.g., dollars)
             currency: Currency code (default: USD)
             metadata: Additional metadata for the payment
-            
+            idempotency_key: Key Stripe uses to collapse retries
+
         Returns:
             Dict containing payment intent details including client_secret
             
         Raises:
             PaymentError: If payment intent creation fails
         """
-        if currency is None:
-            currency = settings.STRIPE_CURRENCY.lower()
-        
         # Convert amount to cents (Stripe requires smallest currency unit)
-        amount_cents = int(amount * 100)
-        
-        try:
-            logger.info(f"Creating Stripe payment intent for ${amount} {currency}")
-            
-            payment_intent = stripe.PaymentIntent.create(
-                amount=amount_cents,
-                currency=currency,
-                metadata=metadata or {},
-                automatic_payment_methods={'enabled': True},
-            )
-            
-            logger.info(f"Payment intent created: {payment_intent.id}")
-            
-            return {
-                'id': payment_intent.id,
-                'client_secret': payment_intent.client_secret,
-                'status': payment_intent.status,
-                'amount': amount,
-                'currency': currency,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error creating payment intent: {e}")
-            raise PaymentError(f"Failed to create payment intent: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error creating payment intent: {e}")
-            raise PaymentError(f"Unexpected error: {str(e)}")
+        amount_cents = _to_minor_units(amount)
+
+        logger.info("Creating Stripe payment intent for $%s %s", amount, currency)
+
+        if idempotency_key is None:
+            order_id = (metadata or {}).get('order_id')
+            idempotency_key = f'intent:{order_id}' if order_id else uuid.uuid4().hex
+
+        payment_intent = stripe.PaymentIntent.create(
+            amount=amount_cents,
+            currency=currency,
+            metadata=metadata or {},
+            automatic_payment_methods={'enabled': True},
+            idempotency_key=idempotency_key,
+        )
+
+        logger.info("Payment intent created: %s", payment_intent.id)
+
+        return {
+            'id': payment_intent.id,
+            'client_secret': payment_intent.client_secret,
+            'status': payment_intent.status,
+            'amount': amount,
+            'currency': currency,
+        }
     
     @staticmethod
+    @_stripe_call("retrieve payment intent")
     def retrieve_payment_intent(payment_intent_id: str) -> Dict[str, Any]:
         """
         Retrieve a Stripe Payment Intent
-        
+
         Args:
             payment_intent_id: Stripe Payment Intent ID
-            
+
         Returns:
             Dict containing payment intent details
-            
+
         Raises:
             PaymentError: If retrieval fails
         """
-        try:
-            logger.info(f"Retrieving payment intent: {payment_intent_id}")
-            
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-            
-            return {
-                'id': payment_intent.id,
-                'status': payment_intent.status,
-                'amount': payment_intent.amount / 100,  # Convert cents to dollars
-                'currency': payment_intent.currency,
-                'charge_id': payment_intent.latest_charge if payment_intent.latest_charge else None,
-                'metadata': payment_intent.metadata,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error retrieving payment intent: {e}")
-            raise PaymentError(f"Failed to retrieve payment intent: {str(e)}")
+        cache_key = f'stripe:pi:{payment_intent_id}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        logger.info("Retrieving payment intent: %s", payment_intent_id)
+
+        payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+
+        result = {
+            'id': payment_intent.id,
+            'status': payment_intent.status,
+            'amount': Decimal(payment_intent.amount) / 100,  # Convert cents to dollars
+            'currency': payment_intent.currency,
+            'charge_id': payment_intent.latest_charge if payment_intent.latest_charge else None,
+            'metadata': payment_intent.metadata,
+        }
+
+        if payment_intent.status in _TERMINAL_INTENT_STATUSES:
+            cache.set(cache_key, result, _TERMINAL_CACHE_TTL_SECONDS)
+
+        return result
     
     @staticmethod
+    @_stripe_call("confirm payment intent")
     def confirm_payment_intent(payment_intent_id: str) -> Dict[str, Any]:
         """
         Confirm a Stripe Payment Intent
-        
+
         Args:
             payment_intent_id: Stripe Payment Intent ID
-            
+
         Returns:
             Dict containing confirmed payment details
-            
+
         Raises:
             PaymentError: If confirmation fails
         """
-        try:
-            logger.info(f"Confirming payment intent: {payment_intent_id}")
-            
-            payment_intent = stripe.PaymentIntent.confirm(payment_intent_id)
-            
-            return {
-                'id': payment_intent.id,
-                'status': payment_intent.status,
-                'amount': payment_intent.amount / 100,
-                'currency': payment_intent.currency,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error confirming payment intent: {e}")
-            raise PaymentError(f"Failed to confirm payment intent: {str(e)}")
+        logger.info("Confirming payment intent: %s", payment_intent_id)
+
+        payment_intent = stripe.PaymentIntent.confirm(
+            payment_intent_id, idempotency_key=f'confirm:{payment_intent_id}'
+        )
+
+        return {
+            'id': payment_intent.id,
+            'status': payment_intent.status,
+            'amount': Decimal(payment_intent.amount) / 100,
+            'currency': payment_intent.currency,
+        }
     
     @staticmethod
+    @_stripe_call("cancel payment intent")
     def cancel_payment_intent(payment_intent_id: str) -> Dict[str, Any]:
         """
         Cancel a Stripe Payment Intent
-        
+
         Args:
             payment_intent_id: Stripe Payment Intent ID
-            
+
         Returns:
             Dict containing cancellation details
-            
+
         Raises:
             PaymentError: If cancellation fails
         """
-        try:
-            logger.info(f"Cancelling payment intent: {payment_intent_id}")
-            
-            payment_intent = stripe.PaymentIntent.cancel(payment_intent_id)
-            
-            return {
-                'id': payment_intent.id,
-                'status': payment_intent.status,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error cancelling payment intent: {e}")
-            raise PaymentError(f"Failed to cancel payment intent: {str(e)}")
+        logger.info("Cancelling payment intent: %s", payment_intent_id)
+
+        payment_intent = stripe.PaymentIntent.cancel(
+            payment_intent_id, idempotency_key=f'cancel:{payment_intent_id}'
+        )
+
+        return {
+            'id': payment_intent.id,
+            'status': payment_intent.status,
+        }
     
     @staticmethod
+    @_stripe_call("create refund")
     def create_refund(charge_id: str, amount: Decimal = None) -> Dict[str, Any]:
         """
         Create a refund for a charge
-        
+
         Args:
             charge_id: Stripe Charge ID
             amount: Amount to refund (optional, full refund if not provided)
-            
+
         Returns:
             Dict containing refund details
-            
+
         Raises:
             PaymentError: If refund creation fails
         """
-        try:
-            refund_data = {'charge': charge_id}
-            
-            if amount is not None:
-                refund_data['amount'] = int(amount * 100)
-            
-            logger.info(f"Creating refund for charge: {charge_id}")
-            
-            refund = stripe.Refund.create(**refund_data)
-            
-            return {
-                'id': refund.id,
-                'status': refund.status,
-                'amount': refund.amount / 100,
-                'currency': refund.currency,
-            }
-            
-        except stripe.error.StripeError as e:
-            logger.error(f"Stripe error creating refund: {e}")
-            raise PaymentError(f"Failed to create refund: {str(e)}")
-    
+        refund_data = {'charge': charge_id}
+
+        if amount is not None:
+            refund_data['amount'] = _to_minor_units(amount)
+
+        logger.info("Creating refund for charge: %s", charge_id)
+
+        # Keyed on charge + amount so concurrent refund requests collapse
+        refund = stripe.Refund.create(
+            **refund_data,
+            idempotency_key=f"refund:{charge_id}:{refund_data.get('amount', 'full')}",
+        )
+
+        return {
+            'id': refund.id,
+            'status': refund.status,
+            'amount': Decimal(refund.amount) / 100,
+            'currency': refund.currency,
+        }
+
+    @staticmethod
+    def bulk_cancel(payment_intent_ids) -> Dict[str, Any]:
+        """
+        Cancel many payment intents concurrently
+
+        Serial cancellation pays one Stripe round-trip per intent; fanning
+        out on the bulk pool makes wall-clock time the slowest call rather
+        than the sum. Returns a dict mapping each intent id to its result,
+        or to the PaymentError it raised.
+        """
+        futures = {
+            _BULK_EXECUTOR.submit(StripePaymentService.cancel_payment_intent, pid): pid
+            for pid in payment_intent_ids
+        }
+        results = {}
+        for future in as_completed(futures):
+            pid = futures[future]
+            try:
+                results[pid] = future.result()
+            except PaymentError as e:
+                results[pid] = e
+        return results
+
+    @staticmethod
+    def bulk_refund(items) -> Dict[str, Any]:
+        """
+        Create many refunds concurrently
+
+        Args:
+            items: Iterable of (charge_id, amount) pairs; amount None means
+                a full refund
+
+        Returns a dict mapping each charge id to its refund details, or to
+        the PaymentError it raised.
+        """
+        futures = {
+            _BULK_EXECUTOR.submit(StripePaymentService.create_refund, charge_id, amount): charge_id
+            for charge_id, amount in items
+        }
+        results = {}
+        for future in as_completed(futures):
+            charge_id = futures[future]
+            try:
+                results[charge_id] = future.result()
+            except PaymentError as e:
+                results[charge_id] = e
+        return results
+
+    @staticmethod
+    def invalidate_cached(session_id: str = None, payment_intent_id: str = None):
+        """Drop cached retrievals after a state change (e.g. a refund)"""
+        if session_id:
+            cache.delete(f'stripe:cs:{session_id}')
+        if payment_intent_id:
+            cache.delete(f'stripe:pi:{payment_intent_id}')
+
     @staticmethod
     def handle_webhook(payload: bytes, sig_header: str) -> Dict[str, Any]:
         """
@@ -328,29 +451,40 @@ class StripePaymentService:
         Args:
             payload: Raw request body
             sig_header: Stripe signature header
-            
+
         Returns:
-            Dict containing event data
-            
+            Dict containing event data; 'duplicate' is True when Stripe has
+            already delivered this event id, so the caller can ACK without
+            reprocessing
+
         Raises:
             PaymentError: If webhook verification fails
         """
         try:
             event = stripe.Webhook.construct_event(
-                payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
+                payload, sig_header, _WEBHOOK_SECRET
             )
-            
-            logger.info(f"Received Stripe webhook event: {event['type']}")
-            
+
+            logger.info("Received Stripe webhook event: %s", event['type'])
+
+            # Stripe retries until it gets a 2xx, so the same event can
+            # arrive more than once; cache.add is an atomic first-seen check
+            duplicate = not cache.add(f"stripe:evt:{event['id']}", 1, 86400)
+            if duplicate:
+                logger.info("Duplicate webhook delivery for event: %s", event['id'])
+
             return {
+                'id': event['id'],
                 'type': event['type'],
                 'data': event['data']['object'],
+                'duplicate': duplicate,
             }
-            
+
+
         except ValueError as e:
-            logger.error(f"Invalid webhook payload: {e}")
+            logger.error("Invalid webhook payload: %s", e)
             raise PaymentError("Invalid payload")
         except stripe.error.SignatureVerificationError as e:
-            logger.error(f"Invalid webhook signature: {e}")
+            logger.error("Invalid webhook signature: %s", e)
             raise PaymentError("Invalid signature")
 
@@ -0,0 +1,93 @@
+"""
+Buffered ESIMQuery logging
+
+Query log rows are analytics, not request-critical data, so instead of an
+inline INSERT on every lookup they go into a bounded in-memory queue that a
+daemon thread drains with bulk_create. This takes one DB round-trip off the
+request path and amortizes INSERT overhead across the batch. If the queue is
+full the row is dropped with a warning — losing an analytics row is better
+than blocking a request.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Flush whenever this many rows are buffered or this much time has passed
+# since the first row of the batch arrived
+FLUSH_MAX_ROWS = 500
+FLUSH_INTERVAL_SECONDS = 2.0
+
+_queue: queue.Queue = queue.Queue(maxsize=10000)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def log_query(row) -> None:
+    """
+    Enqueue an unsaved ESIMQuery instance for batched insertion
+
+    Returns immediately; the row is written by the background flusher.
+    """
+    _ensure_worker()
+    try:
+        _queue.put_nowait(row)
+    except queue.Full:
+        logger.warning("Query log queue full; dropping row for %s", row.iccid)
+
+
+def _ensure_worker() -> None:
+    """Start the daemon flusher thread on first use"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(
+                    target=_drain, name='esimquery-log', daemon=True
+                )
+                _worker.start()
+                atexit.register(_flush_pending)
+
+
+def _drain() -> None:
+    """Worker body: batch queued rows and bulk-insert them"""
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+        while len(batch) < FLUSH_MAX_ROWS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _flush(batch)
+
+
+def _flush(batch: list) -> None:
+    """Insert one batch of rows; a failed flush only loses analytics rows"""
+    from django.db import close_old_connections
+    from .models import ESIMQuery
+
+    try:
+        close_old_connections()
+        ESIMQuery.objects.bulk_create(batch, batch_size=FLUSH_MAX_ROWS)
+    except Exception as e:
+        logger.error("Failed to flush %s query log rows: %s", len(batch), e)
+
+
+def _flush_pending() -> None:
+    """Flush whatever is still queued at interpreter shutdown"""
+    batch = []
+    while True:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _flush(batch)
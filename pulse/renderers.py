@@ -0,0 +1,21 @@
+"""
+orjson-backed DRF renderer
+
+Replaces DRF's default JSONRenderer (pure-Python json.dumps) so response
+serialization happens in C.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Render API responses with orjson"""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=str)
@@ -4,25 +4,26 @@ Orchestrates eSIM renewal process including payment, provider API calls, and ema
 """
 
 import logging
-import uuid
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db import transaction
+from django.db import close_old_connections, transaction
 
 from .models import RenewalPackage, RenewalOrder, PaymentTransaction
 from .payment_service import StripePaymentService, PaymentError
 from .email_service import ESIMEmailService, EmailError
-from .esim_service import try_fetch_from_all_apis
+from .esim_service import ESIMService, try_fetch_from_all_apis
 
 logger = logging.getLogger(__name__)
 
-# Import renewal functions from script_enhanced.py
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Renewal functions from script_enhanced.py (next to manage.py, already on the path)
 from script_enhanced import (
     travelroam_get_catalog,
+    travelroam_find_matching_bundle,
     travelroam_process_order,
     airhub_renew_plan,
     esimcard_check_topup_availability,
@@ -36,6 +37,25 @@ class RenewalError(Exception):
     pass
 
 
+# The TravelRoam catalog is identical for all callers within seconds, so a
+# short-TTL cache turns repeat package listings into a local read instead of
+# a provider round-trip. A longer-lived last-known-good copy is kept so a
+# provider outage degrades to slightly stale data instead of an empty list.
+_CATALOG_CACHE_KEY = 'renewal:packages:travelroam'
+_CATALOG_STALE_KEY = 'renewal:packages:travelroam:stale'
+_CATALOG_STALE_TTL_SECONDS = 3600
+
+# Details and confirmation emails for the same order both need the current
+# eSIM state; a short-lived snapshot means the second send reuses the first
+# send's provider fetch instead of hitting all three APIs again
+_ESIM_SNAPSHOT_TTL_SECONDS = 30
+
+# Worker pool for provider processing when RENEWAL_ASYNC_PROVIDER is on:
+# confirmation then returns as soon as the order is PAID and the provider
+# call finishes in the background instead of holding the request open
+_PROVIDER_TASK_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='renewal-provider')
+
+
 class RenewalService:
     """Service for managing eSIM renewals"""
     
@@ -54,35 +74,61 @@ class RenewalService:
         
         try:
             if provider is None or provider.upper() == 'TRAVELROAM':
-                # Fetch TravelRoam packages
-                try:
-                    catalog = travelroam_get_catalog()
-                    if catalog and 'bundles' in catalog:
-                        for bundle in catalog['bundles']:
-                            packages.append({
-                                'provider': 'TRAVELROAM',
-                                'package_id': bundle.get('name', ''),
-                                'package_name': bundle.get('description', bundle.get('name', '')),
-                                'data_quantity': bundle.get('data', 0),
-                                'data_unit': 'GB',
-                                'validity_days': bundle.get('validity', 0),
-                                'price': bundle.get('price', 0),
-                                'currency': 'USD',
-                            })
-                except Exception as e:
-                    logger.error(f"Error fetching TravelRoam packages: {e}")
+                # Serve the already-built package list from cache when fresh
+                travelroam_packages = cache.get(_CATALOG_CACHE_KEY)
+                if travelroam_packages is None:
+                    try:
+                        catalog = travelroam_get_catalog()
+                        travelroam_packages = []
+                        if catalog and 'bundles' in catalog:
+                            for bundle in catalog['bundles']:
+                                travelroam_packages.append({
+                                    'provider': 'TRAVELROAM',
+                                    'package_id': bundle.get('name', ''),
+                                    'package_name': bundle.get('description', bundle.get('name', '')),
+                                    'data_quantity': bundle.get('data', 0),
+                                    'data_unit': 'GB',
+                                    'validity_days': bundle.get('validity', 0),
+                                    'price': bundle.get('price', 0),
+                                    'currency': 'USD',
+                                })
+                        cache.set(_CATALOG_CACHE_KEY, travelroam_packages,
+                                  settings.RENEWAL_CACHE_TTL_SECONDS)
+                        cache.set(_CATALOG_STALE_KEY, travelroam_packages,
+                                  _CATALOG_STALE_TTL_SECONDS)
+                    except Exception as e:
+                        logger.error("Error fetching TravelRoam packages: %s", e)
+                        # Fall back to the last-known-good catalog if we have one
+                        travelroam_packages = cache.get(_CATALOG_STALE_KEY) or []
+                        if travelroam_packages:
+                            logger.warning("Serving stale TravelRoam catalog after fetch failure")
+                packages.extend(travelroam_packages)
             
             # Add more providers as needed
             # For now, we'll return TravelRoam packages
             # AirHub and eSIMCard package listing would be added here
             
-            logger.info(f"Retrieved {len(packages)} packages")
+            logger.info("Retrieved %d packages", len(packages))
             return packages
             
         except Exception as e:
-            logger.error(f"Error getting available packages: {e}")
+            logger.error("Error getting available packages: %s", e)
             raise RenewalError(f"Failed to get available packages: {str(e)}")
     
+    @staticmethod
+    def get_orders_bulk(order_ids: List[str]) -> List[RenewalOrder]:
+        """
+        Fetch several orders with their package and payment in one query
+
+        Batch flows (e.g. re-sending emails for a day's PAID orders) should
+        go through this instead of looping RenewalOrder.objects.get(), which
+        costs three queries per order.
+        """
+        return list(
+            RenewalOrder.objects.filter(order_id__in=order_ids)
+            .select_related('package', 'payment')
+        )
+
     @staticmethod
     @transaction.atomic
     def create_renewal_order(
@@ -114,18 +160,22 @@ class RenewalService:
         """
         try:
             # Generate unique order ID
-            order_id = f"REN-{uuid.uuid4().hex[:12].upper()}"
-            
-            # Try to get the package from database
+            # 6 random bytes give the same 12 hex chars as the old
+            # uuid4().hex[:12] without generating a full 128-bit UUID;
+            # the unique constraint on order_id backstops collisions
+            order_id = f"REN-{secrets.token_hex(6).upper()}"
+            
+            # Try to get the package from database; a miss is common and
+            # expected, so .first() returning None beats raising and
+            # catching DoesNotExist inside the transaction
             package = None
             if package_id:
-                try:
-                    package = RenewalPackage.objects.get(
-                        provider=provider.upper(),
-                        package_id=package_id
-                    )
-                except RenewalPackage.DoesNotExist:
-                    logger.warning(f"Package not found in DB: {provider} - {package_id}")
+                package = RenewalPackage.objects.filter(
+                    provider=provider.upper(),
+                    package_id=package_id
+                ).first()
+                if package is None:
+                    logger.warning("Package not found in DB: %s - %s", provider, package_id)
             
             # Create renewal order with provider details
             order = RenewalOrder.objects.create(
@@ -145,11 +195,11 @@ class RenewalService:
                 }
             )
             
-            logger.info(f"Created renewal order: {order_id} for {provider} - {iccid}")
+            logger.info("Created renewal order: %s for %s - %s", order_id, provider, iccid)
             return order
             
         except Exception as e:
-            logger.error(f"Error creating renewal order: {e}")
+            logger.error("Error creating renewal order: %s", e)
             raise RenewalError(f"Failed to create renewal order: {str(e)}")
     
     @staticmethod
@@ -165,11 +215,11 @@ class RenewalService:
             Dict containing checkout session details including URL
         """
         try:
-            logger.info(f"Processing payment for order: {order.order_id}")
+            logger.info("Processing payment for order: %s", order.order_id)
             
-            # Create Stripe Checkout Session
-            from django.conf import settings
-            frontend_url = settings.FRONTEND_URL
+            # Create Stripe Checkout Session; success/cancel URLs fall back
+            # to the FRONTEND_URL-derived defaults built once in
+            # payment_service at import
             checkout_session = StripePaymentService.create_checkout_session(
                 amount=order.amount,
                 currency=order.currency,
@@ -178,9 +228,7 @@ class RenewalService:
                     'iccid': order.iccid,
                     'provider': order.provider,
                     'package_name': package_name or 'eSIM Bundle Renewal',
-                },
-                success_url=f'{frontend_url}/renewal/success?session_id={{CHECKOUT_SESSION_ID}}',
-                cancel_url=f'{frontend_url}/renewal/cancelled'
+                }
             )
             
             # Create payment transaction record
@@ -193,7 +241,7 @@ class RenewalService:
                 raw_response=checkout_session
             )
             
-            logger.info(f"Checkout session created: {checkout_session['id']}")
+            logger.info("Checkout session created: %s", checkout_session['id'])
             
             return {
                 'session_id': checkout_session['id'],
@@ -203,14 +251,14 @@ class RenewalService:
             }
             
         except PaymentError as e:
-            logger.error(f"Payment error for order {order.order_id}: {e}")
+            logger.error("Payment error for order %s: %s", order.order_id, e)
             order.status = 'FAILED'
-            order.save()
+            order.save(update_fields=['status', 'updated_at'])
             raise RenewalError(f"Payment failed: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error processing payment: {e}")
+            logger.error("Unexpected error processing payment: %s", e)
             order.status = 'FAILED'
-            order.save()
+            order.save(update_fields=['status', 'updated_at'])
             raise RenewalError(f"Failed to process payment: {str(e)}")
     
     @staticmethod
@@ -235,7 +283,7 @@ class RenewalService:
             )
             order = payment.renewal_order
             
-            logger.info(f"Verifying checkout and completing order: {order.order_id}")
+            logger.info("Verifying checkout and completing order: %s", order.order_id)
             
             # Step 1: Verify payment with Stripe (in separate transaction)
             with transaction.atomic():
@@ -246,134 +294,200 @@ class RenewalService:
                 payment.status = checkout_session['payment_status'].upper()
                 if checkout_session.get('payment_intent'):
                     payment.stripe_charge_id = checkout_session['payment_intent']
-                payment.save()
-                
+                payment.save(update_fields=['status', 'stripe_charge_id', 'updated_at'])
+
                 if checkout_session['payment_status'] == 'paid':
                     # Payment successful, update order
                     order.status = 'PAID'
-                    order.save()
-                    logger.info(f"Order {order.order_id} marked as PAID")
+                    order.save(update_fields=['status', 'updated_at'])
+                    logger.info("Order %s marked as PAID", order.order_id)
                 else:
                     order.status = 'FAILED'
-                    order.save()
+                    order.save(update_fields=['status', 'updated_at'])
                     raise RenewalError(f"Payment not successful: {checkout_session['payment_status']}")
             
             # Step 2: Process renewal with provider (separate transaction, can fail independently)
             if order.status == 'PAID':
-                try:
-                    with transaction.atomic():
-                        provider_response = RenewalService._process_with_provider(order)
-                        
-                        order.status = 'COMPLETED'
-                        order.provider_response = provider_response
-                        order.completed_at = timezone.now()
-                        order.save()
-                        
-                        payment.status = 'SUCCEEDED'
-                        payment.completed_at = timezone.now()
-                        payment.save()
-                        
-                        logger.info(f"Order {order.order_id} completed successfully with provider")
-                        
-                except Exception as e:
-                    logger.error(f"Provider API error for order {order.order_id}: {e}")
-                    # Update order status to show provider API failed
-                    # But payment was successful, so don't roll it back
-                    with transaction.atomic():
-                        order.refresh_from_db()  # Get latest state
-                        order.status = 'PROVIDER_FAILED'
-                        order.provider_response = {'error': str(e), 'payment_successful': True}
-                        order.save()
-                    
-                    # Note: We don't raise the error here because payment was successful
-                    # The order can be manually processed later
-                    logger.warning(f"Order {order.order_id} payment succeeded but provider API failed. Manual processing may be required.")
-            
-            # Refresh order to get latest state
-            order.refresh_from_db()
+                if settings.RENEWAL_ASYNC_PROVIDER:
+                    # Return the PAID order immediately; the provider call
+                    # finishes in the background and flips it to COMPLETED.
+                    # Dispatch via on_commit so the worker can never look up
+                    # the order before the PAID row is visible — under an
+                    # outer atomic block (e.g. in tests) the submit waits
+                    # for that transaction to commit
+                    transaction.on_commit(
+                        lambda order_id=order.order_id: _PROVIDER_TASK_EXECUTOR.submit(
+                            RenewalService._finalize_order_background, order_id
+                        )
+                    )
+                    return order
+                RenewalService._finalize_order(order, payment)
+
+            # Re-read just the columns _finalize_order may have changed
+            order.refresh_from_db(fields=['status', 'provider_response', 'completed_at', 'updated_at'])
             return order
             
         except PaymentTransaction.DoesNotExist:
-            logger.error(f"Payment transaction not found for session: {session_id}")
+            logger.error("Payment transaction not found for session: %s", session_id)
             raise RenewalError("Payment transaction not found")
         except RenewalError:
             # Re-raise RenewalErrors as-is
             raise
         except Exception as e:
-            logger.error(f"Error confirming order: {e}")
+            logger.error("Error confirming order: %s", e)
             raise RenewalError(f"Failed to confirm order: {str(e)}")
     
+    @staticmethod
+    def _finalize_order(order: RenewalOrder, payment: PaymentTransaction) -> None:
+        """
+        Run the provider renewal for a PAID order and record the outcome
+
+        Provider failure never rolls the payment back: the order is marked
+        PROVIDER_FAILED for manual processing instead.
+        """
+        try:
+            with transaction.atomic():
+                provider_response = RenewalService._process_with_provider(order)
+
+                # Nest the API response so the renewal metadata stored at
+                # order creation (plan_name, package_id, renewal_days,
+                # country_code) is preserved instead of overwritten
+                merged_response = dict(order.provider_response or {})
+                merged_response['api_response'] = provider_response
+
+                now = timezone.now()
+
+                order.status = 'COMPLETED'
+                order.provider_response = merged_response
+                order.completed_at = now
+                order.save(update_fields=['status', 'provider_response', 'completed_at', 'updated_at'])
+
+                payment.status = 'SUCCEEDED'
+                payment.completed_at = now
+                payment.save(update_fields=['status', 'completed_at', 'updated_at'])
+
+                logger.info("Order %s completed successfully with provider", order.order_id)
+
+            # Drop cached details so the next lookup shows the new bundle
+            ESIMService.invalidate(order.iccid)
+
+        except Exception as e:
+            logger.error("Provider API error for order %s: %s", order.order_id, e)
+            # Update order status to show provider API failed
+            # But payment was successful, so don't roll it back
+            with transaction.atomic():
+                order.refresh_from_db()  # Get latest state
+                merged_response = dict(order.provider_response or {})
+                merged_response['error'] = str(e)
+                merged_response['payment_successful'] = True
+                order.status = 'PROVIDER_FAILED'
+                order.provider_response = merged_response
+                order.save(update_fields=['status', 'provider_response', 'updated_at'])
+
+            # Note: We don't raise the error here because payment was successful
+            # The order can be manually processed later
+            logger.warning("Order %s payment succeeded but provider API failed. Manual processing may be required.", order.order_id)
+
+    @staticmethod
+    def _finalize_order_background(order_id: str) -> None:
+        """Re-load the order on the worker thread and finalize it"""
+        close_old_connections()
+        try:
+            order = RenewalOrder.objects.get(order_id=order_id)
+            RenewalService._finalize_order(order, order.payment)
+        except Exception as e:
+            logger.error("Background provider processing failed for order %s: %s", order_id, e)
+
+    @staticmethod
+    def _renew_travelroam(order: RenewalOrder, provider_data: Dict[str, Any]) -> Dict[str, Any]:
+        """TravelRoam renewal - top up existing eSIM"""
+        plan_name = provider_data.get('plan_name', '')
+        country_code = provider_data.get('country_code', None)
+
+        # Try to get package_id from provider_response first
+        bundle_name = provider_data.get('package_id', '')
+
+        # If no package_id, find matching bundle from catalog
+        if not bundle_name:
+            logger.info("No package_id found, searching catalog for: %s", plan_name)
+            bundle_name = travelroam_find_matching_bundle(plan_name, country_code)
+
+        if not bundle_name:
+            raise RenewalError(f"Could not find matching bundle for plan: {plan_name}")
+
+        logger.info("TravelRoam renewal: bundle=%s, iccid=%s", bundle_name, order.iccid)
+        return travelroam_process_order(
+            bundle_name=bundle_name,
+            iccid=order.iccid
+        )
+
+    @staticmethod
+    def _renew_airhub(order: RenewalOrder, provider_data: Dict[str, Any]) -> Dict[str, Any]:
+        """AirHub renewal - renew with order ID"""
+        airhub_order_id = order.provider_order_id
+        renewal_days = provider_data.get('renewal_days', 7)
+
+        logger.info("AirHub renewal: order_id=%s, days=%s", airhub_order_id, renewal_days)
+        return airhub_renew_plan(
+            order_id=airhub_order_id,
+            renewal_days=renewal_days,
+            user_amount=str(order.amount)
+        )
+
+    @staticmethod
+    def _renew_esimcard(order: RenewalOrder, provider_data: Dict[str, Any]) -> Dict[str, Any]:
+        """eSIMCard renewal - top up with package ID"""
+        package_id = provider_data.get('package_id', '')
+
+        logger.info("eSIMCard renewal: imei=%s, package=%s", order.iccid, package_id)
+        return esimcard_purchase_package(
+            imei=order.iccid,
+            package_type_id=package_id
+        )
+
+    # Provider name -> renewal handler; new providers register here instead
+    # of growing an if/elif chain in _process_with_provider
+    _PROVIDER_HANDLERS = {
+        'TRAVELROAM': _renew_travelroam,
+        'AIRHUB': _renew_airhub,
+        'ESIMCARD': _renew_esimcard,
+    }
+
     @staticmethod
     def _process_with_provider(order: RenewalOrder) -> Dict[str, Any]:
         """
         Process renewal with the appropriate provider API
-        
+
         Args:
             order: RenewalOrder instance
-            
+
         Returns:
             Provider API response
         """
         provider = order.provider
         provider_data = order.provider_response or {}
-        
+
+        handler = RenewalService._PROVIDER_HANDLERS.get(provider)
+        if handler is None:
+            raise RenewalError(f"Unknown provider: {provider}")
+
         try:
-            if provider == 'TRAVELROAM':
-                # Use TravelRoam API - top up existing eSIM
-                from script_enhanced import travelroam_find_matching_bundle, travelroam_process_order
-                
-                plan_name = provider_data.get('plan_name', '')
-                country_code = provider_data.get('country_code', None)
-                
-                # Try to get package_id from provider_response first
-                bundle_name = provider_data.get('package_id', '')
-                
-                # If no package_id, find matching bundle from catalog
-                if not bundle_name:
-                    logger.info(f"No package_id found, searching catalog for: {plan_name}")
-                    bundle_name = travelroam_find_matching_bundle(plan_name, country_code)
-                
-                if not bundle_name:
-                    raise RenewalError(f"Could not find matching bundle for plan: {plan_name}")
-                
-                logger.info(f"TravelRoam renewal: bundle={bundle_name}, iccid={order.iccid}")
-                response = travelroam_process_order(
-                    bundle_name=bundle_name,
-                    iccid=order.iccid
-                )
-                return response
-                
-            elif provider == 'AIRHUB':
-                # Use AirHub API - renew with order ID
-                airhub_order_id = order.provider_order_id
-                renewal_days = provider_data.get('renewal_days', 7)
-                
-                logger.info(f"AirHub renewal: order_id={airhub_order_id}, days={renewal_days}")
-                response = airhub_renew_plan(
-                    order_id=airhub_order_id,
-                    renewal_days=renewal_days,
-                    user_amount=str(order.amount)
-                )
-                return response
-                
-            elif provider == 'ESIMCARD':
-                # Use eSIMCard API - top up with package ID
-                package_id = provider_data.get('package_id', '')
-                
-                logger.info(f"eSIMCard renewal: imei={order.iccid}, package={package_id}")
-                response = esimcard_purchase_package(
-                    imei=order.iccid,
-                    package_type_id=package_id
-                )
-                return response
-                
-            else:
-                raise RenewalError(f"Unknown provider: {provider}")
-                
+            # staticmethod objects are directly callable on Python 3.10+
+            return handler(order, provider_data)
         except Exception as e:
-            logger.error(f"Error processing with provider {provider}: {e}")
+            logger.error("Error processing with provider %s: %s", provider, e)
             raise
     
+    @staticmethod
+    def _fetch_esim_snapshot(iccid: str):
+        """Provider fetch for the email methods, cached briefly per ICCID"""
+        cache_key = f'renewal:esim:{iccid}'
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = try_fetch_from_all_apis(iccid)
+            cache.set(cache_key, snapshot, _ESIM_SNAPSHOT_TTL_SECONDS)
+        return snapshot
+
     @staticmethod
     def send_esim_details_email(
         order_id: str,
@@ -390,30 +504,36 @@ class RenewalService:
             bool: True if email sent successfully
         """
         try:
-            # Get order
-            order = RenewalOrder.objects.get(order_id=order_id)
-            
+            # Get order; defer unused columns (notably the provider_response
+            # JSON blob) since this path only reads iccid and email fields
+            order = RenewalOrder.objects.only(
+                'order_id', 'iccid', 'customer_email', 'email_sent', 'email_sent_at'
+            ).get(order_id=order_id)
+
             # Fetch latest eSIM details
             provider, airhub_order, airhub_activation, esimcard_data, usage_data, \
                 travelroam_data, travelroam_bundles, travelroam_location = \
-                try_fetch_from_all_apis(order.iccid)
-            
+                RenewalService._fetch_esim_snapshot(order.iccid)
+
             if not provider:
                 raise RenewalError("Could not fetch eSIM details")
             
-            # Prepare eSIM details for email
+            # Prepare eSIM details for email; empty-dict fallbacks replace
+            # the per-field `if airhub_order else 'N/A'` ternaries
+            airhub = airhub_order or {}
+            activation = airhub_activation or {}
             esim_details = {
                 'iccid': order.iccid,
-                'order_sim_id': airhub_order.get('orderId', 'N/A') if airhub_order else 'N/A',
-                'plan_name': airhub_order.get('planName', 'N/A') if airhub_order else 'N/A',
-                'status': 'Active' if airhub_order and airhub_order.get('isActive') else 'Inactive',
-                'purchase_date': airhub_order.get('purchaseDate', 'N/A') if airhub_order else 'N/A',
-                'validity': airhub_order.get('vaildity', 'N/A') if airhub_order else 'N/A',
-                'data_capacity': f"{airhub_order.get('capacity', 'N/A')} {airhub_order.get('capacityUnit', 'GB')}" if airhub_order else 'N/A',
-                'data_consumed': airhub_order.get('dataConsumed', 'N/A') if airhub_order else 'N/A',
-                'data_remaining': airhub_order.get('dataRemaining', 'N/A') if airhub_order else 'N/A',
-                'activation_code': airhub_activation.get('activationCode', 'N/A') if airhub_activation else 'N/A',
-                'apn': airhub_activation.get('apn', 'N/A') if airhub_activation else 'N/A',
+                'order_sim_id': airhub.get('orderId', 'N/A'),
+                'plan_name': airhub.get('planName', 'N/A'),
+                'status': 'Active' if airhub.get('isActive') else 'Inactive',
+                'purchase_date': airhub.get('purchaseDate', 'N/A'),
+                'validity': airhub.get('vaildity', 'N/A'),
+                'data_capacity': f"{airhub.get('capacity', 'N/A')} {airhub.get('capacityUnit', 'GB')}" if airhub else 'N/A',
+                'data_consumed': airhub.get('dataConsumed', 'N/A'),
+                'data_remaining': airhub.get('dataRemaining', 'N/A'),
+                'activation_code': activation.get('activationCode', 'N/A'),
+                'apn': activation.get('apn', 'N/A'),
             }
             
             # Send email
@@ -426,19 +546,19 @@ class RenewalService:
             order.customer_email = recipient_email
             order.email_sent = True
             order.email_sent_at = timezone.now()
-            order.save()
+            order.save(update_fields=['customer_email', 'email_sent', 'email_sent_at', 'updated_at'])
             
-            logger.info(f"eSIM details email sent for order: {order_id}")
+            logger.info("eSIM details email sent for order: %s", order_id)
             return True
             
         except RenewalOrder.DoesNotExist:
-            logger.error(f"Order not found: {order_id}")
+            logger.error("Order not found: %s", order_id)
             raise RenewalError("Order not found")
         except EmailError as e:
-            logger.error(f"Email error: {e}")
+            logger.error("Email error: %s", e)
             raise RenewalError(f"Failed to send email: {str(e)}")
         except Exception as e:
-            logger.error(f"Error sending email: {e}")
+            logger.error("Error sending email: %s", e)
             raise RenewalError(f"Failed to send email: {str(e)}")
     
     @staticmethod
@@ -457,14 +577,19 @@ class RenewalService:
             bool: True if email sent successfully
         """
         try:
-            # Get order
-            order = RenewalOrder.objects.get(order_id=order_id)
-            
+            # Get order with its package in one query, deferring the large
+            # provider_response blob and other unused columns
+            order = RenewalOrder.objects.select_related('package').only(
+                'order_id', 'iccid', 'amount', 'currency',
+                'customer_email', 'email_sent', 'email_sent_at',
+                'package__package_name'
+            ).get(order_id=order_id)
+
             # Fetch latest eSIM details
             provider, airhub_order, airhub_activation, esimcard_data, usage_data, \
                 travelroam_data, travelroam_bundles, travelroam_location = \
-                try_fetch_from_all_apis(order.iccid)
-            
+                RenewalService._fetch_esim_snapshot(order.iccid)
+
             # Prepare renewal details
             renewal_details = {
                 'order_id': order.order_id,
@@ -474,11 +599,12 @@ class RenewalService:
             }
             
             # Prepare eSIM details
+            airhub = airhub_order or {}
             esim_details = {
                 'iccid': order.iccid,
-                'plan_name': airhub_order.get('planName', 'N/A') if airhub_order else 'N/A',
-                'status': 'Active' if airhub_order and airhub_order.get('isActive') else 'Inactive',
-                'data_capacity': f"{airhub_order.get('capacity', 'N/A')} {airhub_order.get('capacityUnit', 'GB')}" if airhub_order else 'N/A',
+                'plan_name': airhub.get('planName', 'N/A'),
+                'status': 'Active' if airhub.get('isActive') else 'Inactive',
+                'data_capacity': f"{airhub.get('capacity', 'N/A')} {airhub.get('capacityUnit', 'GB')}" if airhub else 'N/A',
             }
             
             # Send email
@@ -492,18 +618,18 @@ class RenewalService:
             order.customer_email = recipient_email
             order.email_sent = True
             order.email_sent_at = timezone.now()
-            order.save()
+            order.save(update_fields=['customer_email', 'email_sent', 'email_sent_at', 'updated_at'])
             
-            logger.info(f"Renewal confirmation email sent for order: {order_id}")
+            logger.info("Renewal confirmation email sent for order: %s", order_id)
             return True
             
         except RenewalOrder.DoesNotExist:
-            logger.error(f"Order not found: {order_id}")
+            logger.error("Order not found: %s", order_id)
             raise RenewalError("Order not found")
         except EmailError as e:
-            logger.error(f"Email error: {e}")
+            logger.error("Email error: %s", e)
             raise RenewalError(f"Failed to send email: {str(e)}")
         except Exception as e:
-            logger.error(f"Error sending email: {e}")
+            logger.error("Error sending email: %s", e)
             raise RenewalError(f"Failed to send email: {str(e)}")
 
@@ -1,5 +1,11 @@
+import re
+
 from rest_framework import serializers
-from .models import ESIMQuery, ESIMDetails, RenewalPackage, RenewalOrder, PaymentTransaction
+from .models import ESIMQuery, ESIMDetails, RenewalPackage, RenewalOrder
+
+# Built once at import; validate_iccid runs on every /check/ request
+_ICCID_STRIP = str.maketrans('', '', ' -')
+_ICCID_RE = re.compile(r'^[0-9A-Za-z]+$')
 
 
 class ESIMDetailsSerializer(serializers.Serializer):
@@ -32,11 +38,11 @@ class ESIMQueryRequestSerializer(serializers.Serializer):
     
     def validate_iccid(self, value):
         """Validate ICCID format"""
-        # Remove spaces and dashes
-        cleaned = value.replace(' ', '').replace('-', '')
-        
+        # Remove spaces and dashes in a single pass
+        cleaned = value.translate(_ICCID_STRIP)
+
         # Check if alphanumeric
-        if not cleaned.isalnum():
+        if not _ICCID_RE.match(cleaned):
             raise serializers.ValidationError("ICCID must contain only letters and numbers")
         
         # Check minimum length
@@ -67,6 +73,25 @@ class RenewalPackageSerializer(serializers.ModelSerializer):
         ]
 
 
+# Package rows change rarely, so their serialized form is memoized per
+# (pk, updated_at); an edit bumps updated_at and naturally misses the cache.
+# The cache is cleared wholesale when full rather than tracking LRU order —
+# the catalog is small and rebuilding a few entries is cheap.
+_PACKAGE_REPR_CACHE = {}
+_PACKAGE_REPR_CACHE_MAX = 256
+
+
+def _package_representation(package):
+    key = (package.pk, package.updated_at)
+    cached = _PACKAGE_REPR_CACHE.get(key)
+    if cached is None:
+        cached = RenewalPackageSerializer(package).data
+        if len(_PACKAGE_REPR_CACHE) >= _PACKAGE_REPR_CACHE_MAX:
+            _PACKAGE_REPR_CACHE.clear()
+        _PACKAGE_REPR_CACHE[key] = cached
+    return cached
+
+
 class CreateRenewalOrderSerializer(serializers.Serializer):
     """Serializer for creating a renewal order"""
     
@@ -90,7 +115,7 @@ class CreateRenewalOrderSerializer(serializers.Serializer):
 class RenewalOrderSerializer(serializers.ModelSerializer):
     """Serializer for renewal orders"""
     
-    package_details = RenewalPackageSerializer(source='package', read_only=True)
+    package_details = serializers.SerializerMethodField()
     payment_status = serializers.SerializerMethodField()
     
     class Meta:
@@ -101,12 +126,18 @@ class RenewalOrderSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'completed_at'
         ]
     
+    def get_package_details(self, obj):
+        """Get the (memoized) package representation, or None"""
+        package = obj.package
+        return _package_representation(package) if package else None
+
     def get_payment_status(self, obj):
         """Get payment status if exists"""
-        try:
-            return obj.payment.status
-        except PaymentTransaction.DoesNotExist:
-            return None
+        # getattr instead of try/except: with select_related('payment') a
+        # missing payment resolves from the cached join, and an attribute
+        # check is far cheaper than raising DoesNotExist per row
+        payment = getattr(obj, 'payment', None)
+        return payment.status if payment else None
 
 
 class PaymentIntentResponseSerializer(serializers.Serializer):
@@ -0,0 +1,96 @@
+"""
+Background Email Tasks
+Thread-pool based task layer so email sends happen off the request thread
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Emails are I/O bound, so small worker pools are enough to keep SMTP
+# round-trips off the request path. Renewal confirmations are user-facing
+# and latency-sensitive, so they get their own pool that a bulk details
+# burst can never saturate; details sends get the wider pool.
+_RENEWAL_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='email-renewal')
+_DETAILS_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='email-details')
+
+# Retry policy for transient SMTP failures
+MAX_RETRIES = 5
+RETRY_DELAY_SECONDS = 60
+
+
+def _run_email_job(recipient: str, kind: str, payload: dict, subject: str = None) -> None:
+    """
+    Worker body: execute the send with retries
+
+    Args:
+        recipient: Customer's email address
+        kind: 'details' or 'renewal'
+        payload: Email content dicts (JSON-serializable)
+        subject: Optional subject override
+    """
+    # Imported lazily to avoid a circular import with email_service
+    from .email_service import ESIMEmailService, EmailError
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            if kind == 'renewal':
+                ESIMEmailService._send_renewal_confirmation_now(
+                    recipient,
+                    payload['renewal_details'],
+                    payload['esim_details'],
+                    subject
+                )
+            else:
+                ESIMEmailService._send_esim_details_now(
+                    recipient, payload['esim_details'], subject
+                )
+            return
+        except EmailError as e:
+            logger.warning(
+                "Email send attempt %s/%s failed for %s: %s",
+                attempt, MAX_RETRIES, recipient, e
+            )
+            if attempt < MAX_RETRIES:
+                time.sleep(RETRY_DELAY_SECONDS)
+
+    logger.error("Giving up sending %s email to %s after %s attempts",
+                 kind, recipient, MAX_RETRIES)
+
+
+def queue_esim_email(recipient: str, kind: str, payload: dict, subject: str = None) -> None:
+    """
+    Enqueue an email send on the background pool and return immediately
+
+    Args:
+        recipient: Customer's email address
+        kind: 'details' or 'renewal'
+        payload: Email content dicts (JSON-serializable)
+        subject: Optional subject override
+    """
+    executor = _RENEWAL_EXECUTOR if kind == 'renewal' else _DETAILS_EXECUTOR
+    executor.submit(_run_email_job, recipient, kind, payload, subject)
+    logger.info("Queued %s email for %s", kind, recipient)
+
+
+def _run_email_chunk(jobs: list) -> None:
+    """Worker body: send one chunk of emails over a single SMTP connection"""
+    from .email_service import ESIMEmailService
+    ESIMEmailService.send_many(jobs)
+
+
+def queue_esim_email_chunk(jobs: list) -> None:
+    """
+    Enqueue a chunk of email jobs as one background unit of work
+
+    The worker opens one SMTP connection for the whole chunk (see
+    ESIMEmailService.send_many), so connection setup is paid once per
+    chunk instead of once per email.
+
+    Args:
+        jobs: List of job dicts in the send_many format
+    """
+    _DETAILS_EXECUTOR.submit(_run_email_chunk, jobs)
+    logger.info("Queued email chunk of %s jobs", len(jobs))
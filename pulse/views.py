@@ -15,11 +15,12 @@ from .serializers import (
     ConfirmPaymentSerializer,
     SendEmailSerializer
 )
-from .esim_service import ESIMService
+from .esim_service import get_esim_details
 from .models import ESIMQuery, RenewalOrder
 from .renewal_service import RenewalService, RenewalError
 from .currency_service import currency_service, CurrencyConversionError
 from script_enhanced import OrderNotFoundError, APIError, AuthenticationError
+from script_optimized import provider_circuit_states
 
 logger = logging.getLogger(__name__)
 
@@ -50,18 +51,10 @@ def check_esim_status(request):
     iccid = serializer.validated_data['iccid']
     
     try:
-        # Fetch eSIM details
-        esim_data = ESIMService.get_esim_details(iccid)
-        
-        # Log the query
-        ESIMQuery.objects.create(
-            iccid=iccid,
-            api_provider=esim_data.get('api_provider', 'UNKNOWN'),
-            response_time_ms=esim_data.get('response_time_ms'),
-            was_successful=True,
-            cached_response=esim_data
-        )
-        
+        # Fetch eSIM details; the service logs the query and caches the
+        # response itself so repeat lookups can be served without API calls
+        esim_data = get_esim_details(iccid)
+
         # Serialize and return response
         response_serializer = ESIMDetailsSerializer(data=esim_data)
         if response_serializer.is_valid():
@@ -128,7 +121,8 @@ def health_check(request):
     return Response({
         'status': 'healthy',
         'service': 'eSIM Status Checker API',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'providers': provider_circuit_states()
     }, status=status.HTTP_200_OK)
 
 
@@ -355,7 +349,11 @@ def get_renewal_order(request, order_id):
     GET /api/esim/renewal/order/{order_id}/
     """
     try:
-        order = RenewalOrder.objects.get(order_id=order_id)
+        # One query: the serializer walks package and payment, and never
+        # reads the potentially large provider_response JSON
+        order = RenewalOrder.objects.select_related('package', 'payment').defer(
+            'provider_response'
+        ).get(order_id=order_id)
         serializer = RenewalOrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except RenewalOrder.DoesNotExist:
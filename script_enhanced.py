@@ -5,6 +5,7 @@ Supports multiple API providers based on APN/Network provider
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import sys
 import logging
 import re
@@ -43,6 +44,15 @@ TRAVELROAM_CLIENT_SECRET = "6LDCnfC5wGKxcrT6S6iFbKNpBSRPijrZRDxFObXrqJ1vX9gfIsKH
 
 REQUEST_TIMEOUT = 30  # seconds
 
+# Shared HTTP session with keep-alive pooling: repeat calls to a provider
+# reuse the open TCP+TLS connection instead of paying a fresh handshake
+# (~100-300ms) on every request. Pool sizes cover parallel checks across
+# the three providers.
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=100)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
 
 class APIProvider(Enum):
     """Enum for API providers"""
@@ -98,7 +108,7 @@ def airhub_login() -> Tuple[str, str]:
     
     try:
         logger.info("Attempting to login to AirHub API...")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             timeout=REQUEST_TIMEOUT
@@ -163,7 +173,7 @@ def airhub_get_orders(token: str, partner_code: str, flag: int = 1) -> Dict[str,
     
     try:
         logger.info(f"Fetching orders from AirHub with flag={flag}")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             headers=headers, 
@@ -212,7 +222,7 @@ def airhub_get_activation_details(token: str, partner_code: str, order_ids: List
     
     try:
         logger.info(f"Fetching activation details from AirHub for orders: {order_ids}")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             headers=headers, 
@@ -256,7 +266,7 @@ def esimcard_login() -> str:
     
     try:
         logger.info("Attempting to login to eSIMCard API...")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             timeout=REQUEST_TIMEOUT
@@ -315,7 +325,7 @@ def esimcard_get_my_esims(token: str) -> List[Dict[str, Any]]:
         while True:
             url = f"{ESIMCARD_BASE_URL}/my-esims?page={page}"
             
-            response = requests.get(
+            response = session.get(
                 url, 
                 headers=headers, 
                 timeout=REQUEST_TIMEOUT
@@ -384,7 +394,7 @@ def esimcard_get_esim_by_iccid(token: str, iccid: str) -> Optional[Dict[str, Any
     
     try:
         logger.info(f"🚀 Direct lookup for ICCID {iccid} in eSIMCard...")
-        response = requests.get(
+        response = session.get(
             url, 
             headers=headers, 
             timeout=REQUEST_TIMEOUT
@@ -440,7 +450,7 @@ def esimcard_get_esim_details(token: str, esim_id: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching details for eSIM {esim_id} from eSIMCard API...")
-        response = requests.get(
+        response = session.get(
             url, 
             headers=headers, 
             timeout=REQUEST_TIMEOUT
@@ -487,7 +497,7 @@ def esimcard_get_usage(token: str, esim_id: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching usage for eSIM {esim_id} from eSIMCard API...")
-        response = requests.get(
+        response = session.get(
             url, 
             headers=headers, 
             timeout=REQUEST_TIMEOUT
@@ -537,7 +547,7 @@ def esimcard_get_my_bundles(token: str) -> List[Dict[str, Any]]:
         while True:
             url = f"{ESIMCARD_BASE_URL}/my-bundles?page={page}"
             
-            response = requests.get(
+            response = session.get(
                 url, 
                 headers=headers, 
                 timeout=REQUEST_TIMEOUT
@@ -611,7 +621,7 @@ def travelroam_get_esim_details(iccid: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching eSIM details from TravelRoam for ICCID: {iccid}")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             headers=headers, 
@@ -660,7 +670,7 @@ def travelroam_get_applied_bundles(iccid: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching applied bundles from TravelRoam for ICCID: {iccid}")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             headers=headers, 
@@ -709,7 +719,7 @@ def travelroam_get_location(iccid: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching location from TravelRoam for ICCID: {iccid}")
-        response = requests.post(
+        response = session.post(
             url, 
             json=payload, 
             headers=headers, 
@@ -769,7 +779,7 @@ def travelroam_get_catalog(countries: str = None, region: str = None, descriptio
     
     try:
         logger.info(f"Fetching TravelRoam bundle catalog for {countries or region or 'all'}...")
-        response = requests.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+        response = session.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
@@ -807,7 +817,7 @@ def travelroam_get_bundle_details(bundle_name: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching TravelRoam bundle details for: {bundle_name}")
-        response = requests.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+        response = session.post(url, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
@@ -912,7 +922,7 @@ def travelroam_get_esim_assignments(order_reference: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Fetching eSIM assignments for order: {order_reference}")
-        response = requests.get(
+        response = session.get(
             url,
             params=params,
             headers=headers,
@@ -963,7 +973,7 @@ def travelroam_process_order(bundle_name: str, iccid: str = None) -> Dict[str, A
         logger.info(f"Processing TravelRoam new order for Bundle: {bundle_name}")
     
     try:
-        response = requests.post(
+        response = session.post(
             url,
             json=payload,
             headers=headers,
@@ -1012,7 +1022,7 @@ def airhub_renew_plan(order_id: str, renewal_days: int, user_amount: str) -> Dic
     
     try:
         logger.info(f"Renewing AirHub plan for Order ID: {order_id}, Days: {renewal_days}")
-        response = requests.post(
+        response = session.post(
             url,
             json=payload,
             headers=headers,
@@ -1055,7 +1065,7 @@ def esimcard_check_topup_availability(imei: str) -> Dict[str, Any]:
     
     try:
         logger.info(f"Checking eSIMCard topup availability for IMEI: {imei}")
-        response = requests.post(
+        response = session.post(
             url,
             json=payload,
             headers=headers,
@@ -1102,7 +1112,7 @@ def esimcard_purchase_package(imei: str, package_type_id: str) -> Dict[str, Any]
     
     try:
         logger.info(f"Purchasing eSIMCard package for IMEI: {imei}, Package: {package_type_id}")
-        response = requests.post(
+        response = session.post(
             url,
             json=payload,
             headers=headers,
@@ -3,8 +3,10 @@ Optimized multi-API eSIM fetching with parallel execution
 """
 import requests
 import logging
+import threading
+import time
 from typing import Optional, Dict, Tuple, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from script_enhanced import (
     airhub_login, airhub_get_orders, find_order_by_iccid, airhub_get_activation_details,
     esimcard_login, esimcard_get_esim_by_iccid,
@@ -14,79 +16,181 @@ from script_enhanced import (
 
 logger = logging.getLogger(__name__)
 
+# Shared worker pool for provider fan-out. The checks are pure I/O waits on
+# external HTTPS calls, so one module-level pool (three workers per in-flight
+# lookup) avoids spawning and tearing down threads on every request.
+_PROVIDER_EXECUTOR = ThreadPoolExecutor(max_workers=9, thread_name_prefix='provider-check')
+
+# Upper bound on how long one lookup waits for the slowest provider
+PROVIDER_FETCH_TIMEOUT = 90
+
+# Per-provider caps on concurrent upstream calls: a burst of lookups queues
+# here instead of flooding a provider into 429s or exhausting sockets. Each
+# HTTP call inside a check already carries script_enhanced.REQUEST_TIMEOUT,
+# so a hung provider cannot hold a slot past the timeout.
+_AIRHUB_SEM = threading.BoundedSemaphore(16)
+_ESIMCARD_SEM = threading.BoundedSemaphore(16)
+_TRAVELROAM_SEM = threading.BoundedSemaphore(16)
+
+class _CircuitBreaker:
+    """
+    Minimal thread-safe circuit breaker for one provider
+
+    After fail_max consecutive errors the breaker opens and calls are
+    skipped (fast-fail) for reset_timeout seconds; the first attempt after
+    that probes the provider and either closes the breaker or re-opens it.
+    A clean "not found" is a success, not a failure.
+    """
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: int = 30):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    def allows(self) -> bool:
+        """Whether a call may proceed right now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Half-open: let one probe through; one more failure re-opens
+                self._opened_at = None
+                self._failures = self.fail_max - 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+                logger.warning(f"Circuit breaker '{self.name}' opened for {self.reset_timeout}s")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return 'closed' if self._opened_at is None else 'open'
+
+
+_AIRHUB_CB = _CircuitBreaker('airhub')
+_ESIMCARD_CB = _CircuitBreaker('esimcard')
+_TRAVELROAM_CB = _CircuitBreaker('travelroam')
+
+
+def provider_circuit_states() -> Dict[str, str]:
+    """Current breaker state per provider, for health reporting"""
+    return {cb.name: cb.state for cb in (_AIRHUB_CB, _ESIMCARD_CB, _TRAVELROAM_CB)}
+
+
+# First-successful-wins: return as soon as one provider finds the ICCID
+# instead of waiting for the slowest, after a short grace window in which
+# nearly-done peers may still land for cross-provider field merging.
+# Disable to always wait for every provider (full merge mode).
+SHORT_CIRCUIT_PROVIDERS = True
+ENRICH_GRACE_SECONDS = 0.2
+
 
 def check_airhub_provider(iccid: str) -> Tuple[Optional[APIProvider], Optional[Dict], Optional[Dict]]:
     """Check AirHub provider"""
-    try:
-        logger.info("🔍 Checking AirHub...")
-        access_token, partner_code = airhub_login()
-        orders = airhub_get_orders(access_token, partner_code, flag=1)
-        order = find_order_by_iccid(orders.get('data', []), iccid)
-        
-        activation = None
-        if order:
-            order_id = order.get('orderId')
-            activation_details = airhub_get_activation_details(access_token, partner_code, [order_id])
-            activation = activation_details.get(order_id)
-            logger.info("✅ Found in AirHub")
-            return (APIProvider.AIRHUB, order, activation)
-        
-        logger.info("❌ Not found in AirHub")
+    if not _AIRHUB_CB.allows():
+        logger.info("⛔ AirHub circuit open; skipping")
         return (None, None, None)
+    try:
+        with _AIRHUB_SEM:
+            logger.info("🔍 Checking AirHub...")
+            access_token, partner_code = airhub_login()
+            orders = airhub_get_orders(access_token, partner_code, flag=1)
+            order = find_order_by_iccid(orders.get('data', []), iccid)
+
+            activation = None
+            if order:
+                order_id = order.get('orderId')
+                activation_details = airhub_get_activation_details(access_token, partner_code, [order_id])
+                activation = activation_details.get(order_id)
+                logger.info("✅ Found in AirHub")
+                _AIRHUB_CB.record_success()
+                return (APIProvider.AIRHUB, order, activation)
+
+            logger.info("❌ Not found in AirHub")
+            _AIRHUB_CB.record_success()
+            return (None, None, None)
     except Exception as e:
         logger.warning(f"AirHub check failed: {e}")
+        _AIRHUB_CB.record_failure()
         return (None, None, None)
 
 
 def check_esimcard_provider(iccid: str) -> Tuple[Optional[APIProvider], Optional[Dict], Optional[Dict], Optional[Dict]]:
     """Check eSIMCard provider with OPTIMIZED DIRECT ICCID LOOKUP (no pagination!)"""
-    try:
-        logger.info("🔍 Checking eSIMCard...")
-        token = esimcard_login()
-        
-        # 🚀 NEW: Direct ICCID lookup - no pagination needed!
-        data = esimcard_get_esim_by_iccid(token, iccid)
-        
-        if data:
-            logger.info("✅ Found in eSIMCard")
-            # Extract the different data sections from the response
-            esim_info = data.get('sim', {})
-            in_use_packages = data.get('in_use_packages', [])
-            coverage = data.get('coverage', [])
-            overall_usage = data.get('overall_usage', {})
-            
-            # Structure similar to old format for compatibility
-            result = {
-                'esim': esim_info,
-                'packages': in_use_packages,
-                'coverage': coverage,
-                'usage': overall_usage
-            }
-            
-            return (APIProvider.ESIMCARD, result, data, overall_usage)
-        
-        logger.info("❌ Not found in eSIMCard")
+    if not _ESIMCARD_CB.allows():
+        logger.info("⛔ eSIMCard circuit open; skipping")
         return (None, None, None, None)
+    try:
+        with _ESIMCARD_SEM:
+            logger.info("🔍 Checking eSIMCard...")
+            token = esimcard_login()
+
+            # 🚀 NEW: Direct ICCID lookup - no pagination needed!
+            data = esimcard_get_esim_by_iccid(token, iccid)
+
+            if data:
+                logger.info("✅ Found in eSIMCard")
+                # Extract the different data sections from the response
+                esim_info = data.get('sim', {})
+                in_use_packages = data.get('in_use_packages', [])
+                coverage = data.get('coverage', [])
+                overall_usage = data.get('overall_usage', {})
+
+                # Structure similar to old format for compatibility
+                result = {
+                    'esim': esim_info,
+                    'packages': in_use_packages,
+                    'coverage': coverage,
+                    'usage': overall_usage
+                }
+
+                _ESIMCARD_CB.record_success()
+                return (APIProvider.ESIMCARD, result, data, overall_usage)
+
+            logger.info("❌ Not found in eSIMCard")
+            _ESIMCARD_CB.record_success()
+            return (None, None, None, None)
     except Exception as e:
         logger.warning(f"eSIMCard check failed: {e}")
+        _ESIMCARD_CB.record_failure()
         return (None, None, None, None)
 
 
 def check_travelroam_provider(iccid: str) -> Tuple[Optional[APIProvider], Optional[Dict], Optional[Dict], Optional[Dict]]:
     """Check TravelRoam provider"""
-    try:
-        logger.info("🔍 Checking TravelRoam...")
-        details = travelroam_get_esim_details(iccid)
-        bundles = travelroam_get_applied_bundles(iccid)
-        location = travelroam_get_location(iccid)
-        
-        if details:
-            logger.info("✅ Found in TravelRoam")
-            return (APIProvider.TRAVELROAM, details, bundles, location)
-        logger.info("❌ Not found in TravelRoam")
+    if not _TRAVELROAM_CB.allows():
+        logger.info("⛔ TravelRoam circuit open; skipping")
         return (None, None, None, None)
+    try:
+        with _TRAVELROAM_SEM:
+            logger.info("🔍 Checking TravelRoam...")
+            details = travelroam_get_esim_details(iccid)
+            bundles = travelroam_get_applied_bundles(iccid)
+            location = travelroam_get_location(iccid)
+
+            if details:
+                logger.info("✅ Found in TravelRoam")
+                _TRAVELROAM_CB.record_success()
+                return (APIProvider.TRAVELROAM, details, bundles, location)
+            logger.info("❌ Not found in TravelRoam")
+            _TRAVELROAM_CB.record_success()
+            return (None, None, None, None)
     except Exception as e:
         logger.warning(f"TravelRoam check failed: {e}")
+        _TRAVELROAM_CB.record_failure()
         return (None, None, None, None)
 
 
@@ -103,45 +207,63 @@ def try_fetch_from_all_apis_parallel(iccid: str) -> Tuple:
         'travelroam': {'found': False, 'data': None, 'bundles': None, 'location': None}
     }
     
-    # Use ThreadPoolExecutor for I/O-bound parallel operations
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        # Submit all provider checks
-        future_airhub = executor.submit(check_airhub_provider, iccid)
-        future_esimcard = executor.submit(check_esimcard_provider, iccid)
-        future_travelroam = executor.submit(check_travelroam_provider, iccid)
-        
-        futures = {
-            'airhub': future_airhub,
-            'esimcard': future_esimcard,
-            'travelroam': future_travelroam
-        }
-        
-        # Process results as they complete
-        found_provider = None
-        for provider_name, future in futures.items():
-            try:
-                result = future.result(timeout=90)  # 90 second timeout per provider
-                
-                if provider_name == 'airhub':
-                    provider, order, activation = result
-                    if provider:
-                        results['airhub'] = {'found': True, 'order': order, 'activation': activation}
-                        found_provider = provider
-                        
-                elif provider_name == 'esimcard':
-                    provider, esim, details, usage = result
-                    if provider:
-                        results['esimcard'] = {'found': True, 'esim': esim, 'details': details, 'usage': usage}
-                        found_provider = provider
-                        
-                elif provider_name == 'travelroam':
-                    provider, details, bundles, location = result
-                    if provider:
-                        results['travelroam'] = {'found': True, 'data': details, 'bundles': bundles, 'location': location}
-                        found_provider = provider
-                
-            except Exception as e:
-                logger.error(f"Error checking {provider_name}: {e}")
+    # Fan out on the shared pool and gather results as each provider answers,
+    # so total wall-clock time is max(provider RTT) rather than the sum
+    futures = {
+        _PROVIDER_EXECUTOR.submit(check_airhub_provider, iccid): 'airhub',
+        _PROVIDER_EXECUTOR.submit(check_esimcard_provider, iccid): 'esimcard',
+        _PROVIDER_EXECUTOR.submit(check_travelroam_provider, iccid): 'travelroam',
+    }
+
+    def record_result(provider_name, future):
+        """Unpack one provider's result into results; return provider if found"""
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error checking {provider_name}: {e}")
+            return None
+
+        if provider_name == 'airhub':
+            provider, order, activation = result
+            if provider:
+                results['airhub'] = {'found': True, 'order': order, 'activation': activation}
+                return provider
+
+        elif provider_name == 'esimcard':
+            provider, esim, details, usage = result
+            if provider:
+                results['esimcard'] = {'found': True, 'esim': esim, 'details': details, 'usage': usage}
+                return provider
+
+        elif provider_name == 'travelroam':
+            provider, details, bundles, location = result
+            if provider:
+                results['travelroam'] = {'found': True, 'data': details, 'bundles': bundles, 'location': location}
+                return provider
+
+        return None
+
+    found_provider = None
+    try:
+        for future in as_completed(futures, timeout=PROVIDER_FETCH_TIMEOUT):
+            found_provider = record_result(futures[future], future) or found_provider
+
+            if found_provider and SHORT_CIRCUIT_PROVIDERS:
+                # First hit wins: give nearly-done peers a short grace window
+                # to land for field merging, then stop waiting on the rest
+                remaining = [f for f in futures if not f.done()]
+                if remaining:
+                    done, pending = wait(remaining, timeout=ENRICH_GRACE_SECONDS)
+                    for peer in done:
+                        record_result(futures[peer], peer)
+                    for peer in pending:
+                        peer.cancel()
+                    if pending:
+                        logger.info(f"Short-circuiting; skipped {len(pending)} slower provider(s)")
+                break
+    except TimeoutError:
+        pending = [name for future, name in futures.items() if not future.done()]
+        logger.error(f"Provider checks timed out after {PROVIDER_FETCH_TIMEOUT}s: {pending}")
     
     # Return in format compatible with original function
     provider = found_provider